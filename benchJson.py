@@ -0,0 +1,113 @@
+import sys
+import time
+import random
+import argparse
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from responseTools import FastJSONResponse, compress_body, orjson, brotli
+
+DEFAULT_PATHS = ["/api/distmembers", "/api/clubmembers/1", "/api/get_reserv", "/circles",
+                 "/api/ephoto/events", "/api/ephoto/photos/1"]
+SURNAMES = "김이박최정강조윤장임한오서신권황안송류홍"
+POSITIONS = ["회장", "1부회장", "총무", "재무", "", "", ""]
+
+
+def name(rnd):
+    return rnd.choice(SURNAMES) + "".join(rnd.choice("민서준영지현우성호진수경") for _ in range(2))
+
+
+def payloads(members: int, reservs: int, photos: int):
+    # 엔드포인트별 응답과 같은 모양의 합성 데이터. encoded=True 는 dict 를 그대로 돌려주던 라우트
+    # (FastAPI 가 jsonable_encoder 를 한 번 더 거친다).
+    rnd = random.Random(1)
+    distmembers = [{"id": i, "name": name(rnd), "position": rnd.choice(POSITIONS),
+                    "club_name": f"{rnd.choice(SURNAMES)}{rnd.randint(1, 99)}라이온스클럽"} for i in range(members)]
+    clubmembers = [{"memberNo": i, "memberName": name(rnd), "rankNo": rnd.randint(1, 30),
+                    "rankTitlekor": rnd.choice(POSITIONS) or "-", "clubNo": 1} for i in range(80)]
+    reserv = {"reservs": [{"reservNo": i, "reservFrom": f"2026-05-{i % 28 + 1:02d}T{9 + i % 9:02d}:00",
+                           "visitCnt": rnd.randint(1, 40), "reservMemo": "지구 행사 방문 " * rnd.randint(0, 3),
+                           "visitorName": name(rnd), "status": rnd.choice(["Y", "N", "D"])} for i in range(reservs)],
+              "version": 1767225600000, "full": False}
+    circles = [{"id": i, "name": f"{i}지역 {rnd.randint(1, 9)}지대"} for i in range(40)]
+    events = [{"reservNo": i, "label": f"[2026-05-{i % 28 + 1:02d} 10:00] {name(rnd)} (예약번호: {i})"} for i in range(200)]
+    photo_list = [{"filename": f"{7}-{i}.jpg", "url": f"/static/img/event_photos/7-{i}.jpg",
+                   "thumb": f"/static/img/event_photos/variants/7-{i}-320.webp",
+                   "width": 4032, "height": 3024} for i in range(photos)]
+    return [
+        ("/api/distmembers", distmembers, False),
+        ("/api/clubmembers/{clubno}", clubmembers, False),
+        ("/api/get_reserv?since=", reserv, True),
+        ("/circles", circles, True),
+        ("/api/ephoto/events", events, False),
+        ("/api/ephoto/photos/{reserv_no}", photo_list, False),
+    ]
+
+
+def timeit(fn, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000
+
+
+def bench_local(members, reservs, photos, rounds):
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    print(f"직렬화: {'orjson' if orjson is not None else '표준 json (orjson 미설치)'}, 압축: {', '.join(encodings)}")
+    print(f"{'엔드포인트':<32}{'기존ms':>9}{'신규ms':>9}{'원본B':>10}" + "".join(f"{e + 'B':>10}{e + 'ms':>8}" for e in encodings))
+    for path, data, encoded in payloads(members, reservs, photos):
+        if encoded:
+            before = timeit(lambda: JSONResponse(jsonable_encoder(data)).body, rounds)
+        else:
+            before = timeit(lambda: JSONResponse(data).body, rounds)
+        after = timeit(lambda: FastJSONResponse(data).body, rounds)
+        body = FastJSONResponse(data).body
+        assert JSONResponse(jsonable_encoder(data)).body == body, f"{path}: 직렬화 결과가 다릅니다"
+        line = f"{path:<32}{before:>9.2f}{after:>9.2f}{len(body):>10}"
+        for encoding in encodings:
+            ms = timeit(lambda: compress_body(body, encoding), rounds)
+            line += f"{len(compress_body(body, encoding)):>10}{ms:>8.2f}"
+        print(line)
+    return 0
+
+
+def bench_server(url, paths):
+    # 실행 중인 서버에서 Accept-Encoding 별 실제 전송 바이트를 비교한다.
+    import httpx
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    with httpx.Client(base_url=url, timeout=60) as client:
+        print(f"{'경로':<32}" + "".join(f"{e + 'B':>12}" for e in encodings) + f"{'ms':>8}")
+        for path in paths:
+            line = f"{path:<32}"
+            elapsed = 0.0
+            for encoding in encodings:
+                with client.stream("GET", path, headers={"Accept-Encoding": encoding}) as r:
+                    wire = sum(len(chunk) for chunk in r.iter_raw())
+                    elapsed = r.elapsed.total_seconds() * 1000
+                line += f"{wire:>12}"
+            print(line + f"{elapsed:>8.1f}")
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="JSON API 직렬화 시간과 압축 후 전송 바이트를 비교합니다.")
+    parser.add_argument("--url", help="서버 주소 (예: http://127.0.0.1:8000). 없으면 합성 데이터로 로컬 측정")
+    parser.add_argument("--path", action="append", help=f"서버 모드 측정 경로 (기본: {', '.join(DEFAULT_PATHS)})")
+    parser.add_argument("--members", type=int, default=3000, help="지구 회원 수 (/api/distmembers)")
+    parser.add_argument("--reservs", type=int, default=500, help="예약 수 (/api/get_reserv)")
+    parser.add_argument("--photos", type=int, default=300, help="행사 사진 수")
+    parser.add_argument("--rounds", type=int, default=50, help="반복 횟수 (최솟값 사용)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.url:
+        sys.exit(bench_server(args.url, args.path or DEFAULT_PATHS))
+    sys.exit(bench_local(args.members, args.reservs, args.photos, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
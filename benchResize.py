@@ -0,0 +1,134 @@
+import io
+import sys
+import math
+import time
+import argparse
+from pathlib import Path
+from PIL import Image, ImageChops, ImageStat
+
+from imageTools import shrink_image, SHRINK_PROBE_SIDE, ImageBudgetError
+
+VALID_EXTS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+def legacy_shrink(contents: bytes, max_bytes: int) -> bytes:
+    # 이전 resize_image_if_needed 루프 (품질 -10, 이후 0.9배 축소, 최대 10회 인코딩)
+    image = Image.open(io.BytesIO(contents))
+    format = image.format if image.format else 'JPEG'
+    quality = 85
+    for trial in range(10):
+        buffer = io.BytesIO()
+        save_kwargs = {'format': format}
+        if format.upper() in ['JPEG', 'JPG']:
+            save_kwargs['quality'] = quality
+            save_kwargs['optimize'] = True
+        image.save(buffer, **save_kwargs)
+        data = buffer.getvalue()
+        if len(data) <= max_bytes:
+            return data
+        if format.upper() in ['JPEG', 'JPG'] and quality > 30:
+            quality -= 10
+        else:
+            w, h = image.size
+            image = image.resize((int(w * 0.9), int(h * 0.9)), Image.LANCZOS)
+    return data
+
+
+class EncodeCounter:
+    # Image.save 호출 수(= 인코딩 횟수)를 센다. full 은 probe 보다 큰 본 인코딩만 센다.
+    def __init__(self):
+        self.count = 0
+        self.full = 0
+        self.pixels = 0
+        self.original = Image.Image.save
+    def __enter__(self):
+        counter = self
+        def save(image, *args, **kwargs):
+            counter.count += 1
+            counter.full += max(image.size) > SHRINK_PROBE_SIDE
+            counter.pixels += image.width * image.height
+            return counter.original(image, *args, **kwargs)
+        Image.Image.save = save
+        return self
+    def __exit__(self, *exc):
+        Image.Image.save = self.original
+
+
+def psnr(original: Image.Image, data: bytes) -> float:
+    # 결과를 원본 해상도로 되돌려 비교한다 (해상도 손실도 품질 손실로 잡힌다).
+    out = Image.open(io.BytesIO(data)).convert("RGB")
+    ref = original.convert("RGB")
+    if out.size != ref.size:
+        out = out.resize(ref.size, Image.LANCZOS)
+    stat = ImageStat.Stat(ImageChops.difference(ref, out))
+    mse = sum(s / stat.count[0] for s in stat.sum2) / len(stat.sum2)
+    return float("inf") if mse == 0 else 10 * math.log10(255 * 255 / mse)
+
+
+def measure(fn, contents, max_bytes, original):
+    with EncodeCounter() as counter:
+        t0 = time.perf_counter()
+        data = fn(contents, max_bytes)
+        elapsed = time.perf_counter() - t0
+    return {
+        "ms": elapsed * 1000,
+        "bytes": len(data),
+        "fits": len(data) <= max_bytes,
+        "encodes": counter.count,
+        "full": counter.full,
+        "mpix": counter.pixels / 1e6,
+        "psnr": psnr(original, data),
+    }
+
+
+def run(corpus: Path, max_bytes: int, limit: int):
+    files = sorted(p for p in corpus.iterdir() if p.suffix.lower() in VALID_EXTS)[:limit]
+    if not files:
+        print(f"[ERROR] 이미지가 없습니다: {corpus}")
+        return 1
+    totals = {"legacy": [], "target": []}
+    print(f"{'file':<32} {'mode':>7} {'ms':>8} {'bytes':>9} {'fits':>5} {'enc':>4} {'full':>5} {'Mpix':>7} {'PSNR':>7}")
+    for path in files:
+        contents = path.read_bytes()
+        if len(contents) <= max_bytes:
+            continue
+        original = Image.open(io.BytesIO(contents))
+        original.load()
+        for mode, fn in (("legacy", legacy_shrink), ("target", shrink_image)):
+            try:
+                r = measure(fn, contents, max_bytes, original)
+            except ImageBudgetError as e:
+                print(f"{path.name[:32]:<32} {mode:>7} [FAIL] {e}")
+                continue
+            totals[mode].append(r)
+            print(f"{path.name[:32]:<32} {mode:>7} {r['ms']:>8.1f} {r['bytes']:>9} {str(r['fits']):>5} "
+                  f"{r['encodes']:>4} {r['full']:>5} {r['mpix']:>7.1f} {r['psnr']:>7.2f}")
+
+    print("\n===== 합계 =====")
+    for mode, rows in totals.items():
+        if not rows:
+            continue
+        n = len(rows)
+        print(f"{mode:>7}: 파일 {n}, 평균 {sum(r['ms'] for r in rows) / n:.1f} ms, "
+              f"평균 인코딩 {sum(r['encodes'] for r in rows) / n:.1f} 회(본 인코딩 {sum(r['full'] for r in rows) / n:.1f}), "
+              f"평균 {sum(r['bytes'] for r in rows) / n:.0f} B, "
+              f"초과 {sum(not r['fits'] for r in rows)}, "
+              f"평균 PSNR {sum(r['psnr'] for r in rows) / n:.2f} dB")
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="resize_image_if_needed 의 이전 루프와 목표 크기 인코더를 비교합니다.")
+    parser.add_argument("--corpus", default="./static/img/event_photos", help="원본 사진 폴더 (휴대폰 사진 권장)")
+    parser.add_argument("--max-bytes", type=int, default=314572, help="목표 바이트 수")
+    parser.add_argument("--limit", type=int, default=50, help="최대 파일 수")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sys.exit(run(Path(args.corpus), args.max_bytes, args.limit))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import sys
+import time
+import asyncio
+import argparse
+import tracemalloc
+
+from sseHub import SseHub, MemorySseBroker
+
+
+async def sse_client(sub):
+    # /sse/schedule 제너레이터와 같은 방식으로 큐를 소비한다.
+    while True:
+        msg = await sub.queue.get()
+        if msg["event"] == "ping":
+            line = ": ping\n\n"
+        else:
+            line = f"id: {msg['id']}\nevent: {msg['event']}\n"
+        line.encode()
+
+
+async def legacy_client(q, timeout):
+    # 기존 방식: 연결마다 wait_for 타이머를 돌리며 타임아웃마다 ping
+    while True:
+        try:
+            await asyncio.wait_for(q.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            ": ping\n\n".encode()
+
+
+async def drain(hub):
+    while any(not sub.queue.empty() for sub in hub.subscribers):
+        await asyncio.sleep(0)
+
+
+async def bench_hub(clients, rounds):
+    hub = SseHub(MemorySseBroker(), heartbeat_sec=3600)
+    await hub.broker.start(hub.deliver)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tasks = []
+    for _ in range(clients):
+        sub = hub.connect()
+        tasks.append(asyncio.create_task(sse_client(sub)))
+    await asyncio.sleep(0)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    mem = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+    cpu = 0.0
+    for _ in range(rounds):
+        t0 = time.process_time()
+        hub.heartbeat()
+        await drain(hub)
+        cpu += time.process_time() - t0
+
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return mem / clients, cpu / rounds
+
+
+async def bench_legacy(clients, rounds, timeout=0.2):
+    queues = [asyncio.Queue() for _ in range(clients)]
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tasks = [asyncio.create_task(legacy_client(q, timeout)) for q in queues]
+    await asyncio.sleep(0)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    mem = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+    # 타임아웃 주기 동안 쓴 CPU 에서 유휴 시간을 뺄 수 없으므로 주기 단위로 나눈다.
+    t0 = time.process_time()
+    await asyncio.sleep(timeout * rounds)
+    cpu = time.process_time() - t0
+
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return mem / clients, cpu / rounds
+
+
+async def run(client_counts, rounds):
+    print(f"{'clients':>8} {'mode':>10} {'mem/conn':>12} {'cpu/heartbeat':>15}")
+    for n in client_counts:
+        for mode, fn in (("legacy", bench_legacy), ("shared", bench_hub)):
+            mem, cpu = await fn(n, rounds)
+            print(f"{n:>8} {mode:>10} {mem:>10.0f} B {cpu * 1000:>12.2f} ms")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="SSE heartbeat 방식별 연결당 메모리와 heartbeat 당 CPU 를 측정합니다.")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1000, 5000], help="동시 접속 수")
+    parser.add_argument("--rounds", type=int, default=10, help="heartbeat 반복 횟수")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    asyncio.run(run(args.clients, args.rounds))
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
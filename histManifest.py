@@ -0,0 +1,95 @@
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageOps
+
+from histTools import HIST_DIR, HIST_MANIFEST, HIST_VARIANT_WIDTHS, hist_section, hist_entry, natural_sort_key
+from imageTools import display_size
+
+
+def make_hist_variants(path: str, quality: int, force: bool):
+    # 원본보다 작은 폭만 progressive JPEG 으로 만든다. 원본보다 새 축소본이 있으면 다시 만들지 않는다.
+    src = Path(path)
+    out_dir = src.parent / "variants"
+    out_dir.mkdir(exist_ok=True)
+    src_mtime = src.stat().st_mtime_ns
+    variants = {}
+    made = 0
+    with Image.open(src) as img:
+        width, height = display_size(img)
+        image = None
+        for w in HIST_VARIANT_WIDTHS:
+            if w >= width:
+                continue
+            name = f"{src.stem}-{w}.jpg"
+            dst = out_dir / name
+            variants[w] = name
+            if not force and dst.exists() and dst.stat().st_mtime_ns >= src_mtime:
+                continue
+            if image is None:
+                image = ImageOps.exif_transpose(img).convert("RGB")
+            resized = image.resize((w, max(1, round(height * w / width))), Image.LANCZOS)
+            tmp = dst.with_name(f".{name}.part")
+            resized.save(tmp, format="JPEG", quality=quality, progressive=True, optimize=True)
+            os.replace(tmp, dst)
+            made += 1
+    return src.name, width, height, variants, made
+
+
+def build(input_dir: Path, manifest_path: Path, jobs: int, quality: int, force: bool):
+    if not input_dir.is_dir():
+        print(f"[ERROR] 입력 폴더가 존재하지 않습니다: {input_dir}")
+        return 1
+    names = sorted((n for n in os.listdir(input_dir) if hist_section(n)), key=natural_sort_key)
+    paths = [str(input_dir / n) for n in names]
+
+    errors = 0
+    made = 0
+    sections = defaultdict(list)
+    with ProcessPoolExecutor(jobs) as pool:
+        futures = [pool.submit(make_hist_variants, p, quality, force) for p in paths]
+        for path, future in zip(paths, futures):
+            try:
+                name, width, height, variants, count = future.result()
+            except Exception as e:
+                errors += 1
+                print(f"[ERROR] {path}: {e}")
+                continue
+            made += count
+            sections[hist_section(name)].append(hist_entry(name, width, height, variants))
+            print(f"[OK] {name} {width}x{height} 축소본 {len(variants)}개 (새로 {count})")
+
+    tmp = manifest_path.with_name(f".{manifest_path.name}.part")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump({"sections": sections}, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, manifest_path)
+
+    print("\n===== 완료 =====")
+    print(f"이미지: {len(paths)}")
+    print(f"새 축소본: {made}")
+    print(f"에러: {errors}")
+    print(f"매니페스트: {manifest_path}")
+    return 0 if errors == 0 else 2
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="/history 갤러리 매니페스트와 축소본(progressive JPEG)을 만듭니다. 배포 시 한 번 실행합니다.")
+    parser.add_argument("--input", default=str(HIST_DIR), help="hist 이미지 폴더")
+    parser.add_argument("--manifest", default=str(HIST_MANIFEST), help="매니페스트 경로")
+    parser.add_argument("--jobs", type=int, default=0, help="동시 변환 프로세스 수 (0: CPU 코어 수)")
+    parser.add_argument("--quality", type=int, default=80, help="JPEG 품질")
+    parser.add_argument("--force", action="store_true", help="기존 축소본이 있어도 다시 생성")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sys.exit(build(Path(args.input), Path(args.manifest), args.jobs or os.cpu_count() or 1, args.quality, args.force))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import os
+import re
+import json
+from pathlib import Path
+from collections import defaultdict
+from PIL import Image
+
+from imageTools import display_size
+
+# /history 갤러리 공용 (main.py, histManifest.py). histManifest.py 가 main 을 import 하지 않도록
+# 앱/DB/.env 에 의존하는 것은 여기 두지 않는다.
+
+
+def natural_sort_key(s):
+    return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', s)]
+
+
+# histManifest.py 가 만든 manifest.json (섹션별 이미지, 크기, 축소본) 을 앱 시작 시 읽는다.
+HIST_DIR = Path("static/assets/hist")
+HIST_URL = "/static/assets/hist"
+HIST_MANIFEST = HIST_DIR / "manifest.json"
+HIST_SECTIONS = ("h1", "h2", "h3", "h4", "h5", "h6", "h7")
+HIST_VARIANT_WIDTHS = (480, 960, 1600)
+HIST_EXTS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+HIST_PLACEHOLDERS = {section: "https://dummyimage.com/800x500/5c2a8a/ffffff" for section in HIST_SECTIONS}
+HIST_PLACEHOLDERS["h1"] = "https://dummyimage.com/800x500/343a40/6c757d"
+
+
+def hist_section(name: str):
+    # "h3-12.jpg" -> "h3"
+    section = name.split("-", 1)[0]
+    if "-" not in name or section not in HIST_SECTIONS or not name.lower().endswith(HIST_EXTS):
+        return None
+    return section
+
+
+def hist_entry(name: str, width: int | None, height: int | None, variants: dict) -> dict:
+    # variants: {폭: 축소본 파일명}. 기본 src 는 중간 폭 축소본, 없으면 원본.
+    original = f"{HIST_URL}/{name}"
+    srcset = [f"{HIST_URL}/variants/{variants[w]} {w}w" for w in sorted(variants)]
+    if srcset and width:
+        srcset.append(f"{original} {width}w")
+    mid = variants.get(HIST_VARIANT_WIDTHS[1])
+    return {
+        "src": f"{HIST_URL}/variants/{mid}" if mid else original,
+        "original": original,
+        "srcset": ", ".join(srcset),
+        "width": width,
+        "height": height,
+    }
+
+
+def scan_hist() -> dict:
+    # 매니페스트가 없을 때 (histManifest.py 를 아직 안 돌린 경우) 원본만으로 만든다.
+    sections = defaultdict(list)
+    if not HIST_DIR.exists():
+        return {}
+    for name in sorted(os.listdir(HIST_DIR), key=natural_sort_key):
+        section = hist_section(name)
+        if section is None:
+            continue
+        try:
+            with Image.open(HIST_DIR / name) as img:
+                width, height = display_size(img)
+        except Exception:
+            width = height = None
+        sections[section].append(hist_entry(name, width, height, {}))
+    return dict(sections)
+
+
+def load_hist_manifest() -> dict:
+    try:
+        with HIST_MANIFEST.open(encoding="utf-8") as f:
+            return json.load(f)["sections"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return scan_hist()
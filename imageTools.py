@@ -0,0 +1,348 @@
+import io
+import os
+import math
+import uuid
+import shutil
+import struct
+import hashlib
+import subprocess
+from pathlib import Path
+from PIL import Image, ImageOps
+
+# 사진 처리 함수 모음. ImagePool 의 spawn 워커는 main 대신 이 모듈만 import 하므로
+# 앱/DB/.env/SSE 브로커에 의존하는 것은 여기 두지 않는다.
+MEMBERPHOTO_DIR = "./static/img/members"
+READ_CHUNK = 1024 * 1024
+
+
+def part_path(dest: Path) -> Path:
+    # 같은 폴더의 숨김 임시 파일 (PhotoIndex/파일명 규칙에 걸리지 않는다)
+    return dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.part")
+
+
+# 업로드 사진의 반응형 파생 이미지 (원본 옆 variants/ 폴더에 {stem}-{width}.{fmt} 로 저장)
+VARIANT_WIDTHS = (320, 800, 1600)
+Image.init()
+# AVIF 는 Pillow 빌드(pillow-avif-plugin 등)에 따라 저장 가능할 때만 만든다.
+VARIANT_FORMATS = ("avif", "webp") if "AVIF" in Image.SAVE else ("webp",)
+VARIANT_SAVE_OPTS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "avif": {"format": "AVIF", "quality": 60},
+}
+
+
+def variant_path(src: Path, width: int, fmt: str) -> Path:
+    return src.parent / "variants" / f"{src.stem}-{width}.{fmt}"
+
+
+def make_variants(src: Path, url_prefix: str) -> dict:
+    # 원본보다 큰 폭은 원본 크기로 저장해서 어떤 폭을 요청해도 파생 이미지가 있게 한다.
+    out = {}
+    (src.parent / "variants").mkdir(parents=True, exist_ok=True)
+    with Image.open(src) as img:
+        img = ImageOps.exif_transpose(img)
+        img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+        for width in VARIANT_WIDTHS:
+            if width < img.width:
+                resized = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+            else:
+                resized = img
+            for fmt in VARIANT_FORMATS:
+                path = variant_path(src, width, fmt)
+                # 중복 사진끼리 하드링크를 공유하므로 제자리에 덮어쓰지 않고 임시 파일 -> rename
+                tmp = part_path(path)
+                resized.save(tmp, **VARIANT_SAVE_OPTS[fmt])
+                os.replace(tmp, path)
+                out.setdefault(fmt, {})[str(width)] = f"{url_prefix}/variants/{path.name}"
+    return out
+
+
+def link_photo(src: Path, dest: Path, url_prefix: str) -> dict | None:
+    # dest 를 src 의 하드링크로 바꾸고 파생 이미지도 링크한다. 파생 이미지가 빠져 있으면 None.
+    tmp = part_path(dest)
+    os.link(src, tmp)
+    os.replace(tmp, dest)
+    out = {}
+    (dest.parent / "variants").mkdir(parents=True, exist_ok=True)
+    for width in VARIANT_WIDTHS:
+        for fmt in VARIANT_FORMATS:
+            src_variant = variant_path(src, width, fmt)
+            if not src_variant.exists():
+                return None
+            path = variant_path(dest, width, fmt)
+            tmp = part_path(path)
+            os.link(src_variant, tmp)
+            os.replace(tmp, path)
+            out.setdefault(fmt, {})[str(width)] = f"{url_prefix}/variants/{path.name}"
+    return out
+
+
+def remove_variants(src: Path):
+    for width in VARIANT_WIDTHS:
+        for fmt in VARIANT_SAVE_OPTS:
+            variant_path(src, width, fmt).unlink(missing_ok=True)
+
+
+# EXIF 방향(0x0112): 화면에 보이는 그림을 시계 방향 90도 돌렸을 때의 새 값, jpegtran 무손실 변환 옵션
+ORIENTATION_CW = {1: 6, 6: 3, 3: 8, 8: 1, 2: 7, 7: 4, 4: 5, 5: 2}
+JPEGTRAN_OPS = {
+    2: ["-flip", "horizontal"], 3: ["-rotate", "180"], 4: ["-flip", "vertical"], 5: ["-transpose"],
+    6: ["-rotate", "90"], 7: ["-transverse"], 8: ["-rotate", "270"],
+}
+JPEGTRAN = shutil.which("jpegtran")
+
+
+def jpeg_orientation(data: bytes):
+    # JPEG 세그먼트를 따라가 APP1(Exif) IFD0 의 방향 값 위치를 찾는다 -> (Exif 유무, 값 offset, struct 형식)
+    try:
+        return find_jpeg_orientation(data)
+    except (struct.error, IndexError):
+        return False, None, None
+
+
+def find_jpeg_orientation(data: bytes):
+    i = 2
+    while i + 4 <= len(data) and data[i] == 0xFF:
+        marker = data[i + 1]
+        if marker == 0xDA:  # SOS: 이후는 압축 데이터
+            break
+        length = struct.unpack(">H", data[i + 2:i + 4])[0]
+        if marker == 0xE1 and data[i + 4:i + 10] == b"Exif\0\0":
+            tiff = i + 10
+            fmt = "<" if data[tiff:tiff + 2] == b"II" else ">"
+            ifd0 = tiff + struct.unpack(fmt + "I", data[tiff + 4:tiff + 8])[0]
+            count = struct.unpack(fmt + "H", data[ifd0:ifd0 + 2])[0]
+            for k in range(count):
+                entry = ifd0 + 2 + 12 * k
+                tag, typ = struct.unpack(fmt + "HH", data[entry:entry + 4])
+                if tag == 0x0112 and typ == 3:
+                    return True, entry + 8, fmt + "H"
+            return True, None, None
+        i += 2 + length
+    return False, None, None
+
+
+def set_jpeg_orientation(data: bytes, orientation: int) -> bytes | None:
+    # 압축 데이터는 그대로 두고 방향 값 2바이트만 바꾼다. 태그가 없으면 최소 Exif 세그먼트를 넣는다.
+    has_exif, offset, fmt = jpeg_orientation(data)
+    if offset is not None:
+        return data[:offset] + struct.pack(fmt, orientation) + data[offset + 2:]
+    if has_exif:
+        return None  # 방향 태그 없는 Exif: IFD 를 다시 쓰지 않고 호출 측에서 픽셀 회전으로 처리
+    tiff = b"MM\x00\x2a" + struct.pack(">I", 8) + struct.pack(">HHHIHH", 1, 0x0112, 3, 1, orientation, 0) + struct.pack(">I", 0)
+    payload = b"Exif\0\0" + tiff
+    segment = b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload
+    pos = 2
+    if data[2:4] == b"\xff\xe0":  # JFIF APP0 뒤에 넣는다
+        pos = 4 + struct.unpack(">H", data[4:6])[0]
+    return data[:pos] + segment + data[pos:]
+
+
+def normalize_orientation(path: Path) -> str | None:
+    # 업로드 직후 방향 태그를 픽셀에 반영한다. 파일이 바뀌면 새 sha256, 아니면 None.
+    # JPEG: jpegtran(-perfect) 이 있으면 무손실 변환 후 태그를 1 로. 없거나 MCU 경계가 안 맞으면 태그를 그대로 둔다
+    #       (브라우저와 파생 이미지가 태그를 따르므로 재인코딩 손실을 만들지 않는다).
+    # PNG/WebP: 방향 태그가 있는 경우에만 픽셀을 돌려 다시 저장한다.
+    tmp = part_path(path)
+    data = path.read_bytes()
+    if data[:2] == b"\xff\xd8":
+        _, offset, fmt = jpeg_orientation(data)
+        current = struct.unpack(fmt, data[offset:offset + 2])[0] if offset is not None else 1
+        if current not in JPEGTRAN_OPS or not JPEGTRAN:
+            return None
+        result = subprocess.run([JPEGTRAN, "-copy", "all", "-perfect", *JPEGTRAN_OPS[current], "-outfile", str(tmp), str(path)],
+                                capture_output=True)
+        if result.returncode != 0:
+            tmp.unlink(missing_ok=True)
+            return None
+        data = set_jpeg_orientation(tmp.read_bytes(), 1)
+        if data is None:
+            tmp.unlink(missing_ok=True)
+            return None
+        tmp.write_bytes(data)
+    else:
+        with Image.open(path) as img:
+            if img.getexif().get(0x0112, 1) == 1:
+                return None
+            fmt = img.format
+            ImageOps.exif_transpose(img).save(tmp, format=fmt, **({"quality": 90} if fmt == "WEBP" else {}))
+    os.replace(tmp, path)
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def display_size(img) -> tuple[int, int]:
+    # EXIF 방향까지 반영한 화면 기준 (폭, 높이)
+    width, height = img.size
+    if img.getexif().get(0x0112) in (5, 6, 7, 8):
+        width, height = height, width
+    return width, height
+
+
+SHRINK_PROBE_SIDE = 640
+SHRINK_QUALITIES = tuple(range(30, 86, 5))
+SHRINK_MAX_ENCODES = 5
+
+
+def encode_image(image, format: str, quality: int | None = None) -> bytes:
+    buffer = io.BytesIO()
+    save_kwargs = {'format': format}
+    if quality is not None:
+        save_kwargs['quality'] = quality
+        save_kwargs['optimize'] = True
+    image.save(buffer, **save_kwargs)
+    return buffer.getvalue()
+
+
+def scale_image(image, scale: float):
+    if scale >= 1:
+        return image
+    w, h = image.size
+    return image.resize((max(1, int(w * scale)), max(1, int(h * scale))), Image.LANCZOS)
+
+
+class ImageBudgetError(ValueError):
+    # shrink_image 가 가장 낮은 품질, 가장 작은 크기로도 max_bytes 안에 넣지 못했다
+    pass
+
+
+def shrink_image(contents: bytes, max_bytes: int) -> bytes:
+    # 이전 루프와 같은 순서: 품질을 먼저 낮추고, 가장 낮은 품질로도 넘칠 때만 크기를 줄인다.
+    # (예산이 크면 결과도 크거나 같다. 작게 나온 결과를 두고 해상도를 깎지 않는다.)
+    # 크기 예측: bytes(q, s) ~ probe(q) * (원본 픽셀/probe 픽셀) * s^2 * correction
+    # probe 는 긴 변 640px 축소본, correction 은 본 인코딩 결과로 매번 다시 맞춰서 본 인코딩 횟수를 줄인다.
+    image = Image.open(io.BytesIO(contents))
+    format = (image.format or 'JPEG').upper()
+    image = ImageOps.exif_transpose(image)  # 다시 저장하면 Exif 가 빠지므로 방향을 픽셀에 반영해 둔다
+    jpeg = format in ('JPEG', 'JPG')
+    if jpeg and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    image.load()
+
+    probe = scale_image(image, SHRINK_PROBE_SIDE / max(image.size))
+    pixel_ratio = (image.width * image.height) / (probe.width * probe.height)
+    probe_sizes = {}
+
+    def predict(quality):
+        if quality not in probe_sizes:
+            probe_sizes[quality] = len(encode_image(probe, format, quality)) * pixel_ratio
+        return probe_sizes[quality]
+
+    qualities = SHRINK_QUALITIES if jpeg else (None,)
+    correction = 1.0
+    encodes = 0
+
+    def highest_fit(lo, hi):
+        # [lo, hi] 에서 예측상 맞는 가장 높은 품질 (예측 크기는 품질에 대해 단조). 없으면 lo.
+        found = lo
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            if predict(qualities[mid]) * correction <= max_bytes:
+                found, lo = mid, mid + 1
+            else:
+                hi = mid - 1
+        return found
+
+    # 1) 원본 크기에서 예산에 맞는 가장 높은 품질. 실제로 맞은 품질(lo)과 넘친 품질(hi) 사이만 본다.
+    lo, hi, best = 0, len(qualities) - 1, None
+    while lo <= hi and encodes < SHRINK_MAX_ENCODES:
+        k = highest_fit(lo, hi)
+        data = encode_image(image, format, qualities[k])
+        encodes += 1
+        correction = len(data) / predict(qualities[k])
+        if len(data) <= max_bytes:
+            best, lo = data, k + 1
+            if lo > hi or predict(qualities[lo]) * correction > max_bytes:
+                break
+        else:
+            hi = k - 1
+    if best is not None:
+        return best
+
+    # 2) 가장 낮은 품질에서 예산에 맞는 가장 큰 배율. 예산의 85% 이상 채우면 멈춘다.
+    quality = qualities[0]
+    fit_scale, over_scale = 0.0, 1.0
+    scale = min(1.0, math.sqrt(max_bytes / (predict(quality) * correction)) * 0.97)
+    while True:
+        data = encode_image(scale_image(image, scale), format, quality)
+        encodes += 1
+        size = len(data)
+        if size <= max_bytes:
+            best, fit_scale = data, scale
+            if size >= max_bytes * 0.85 or scale >= 1.0 or encodes >= SHRINK_MAX_ENCODES:
+                return best
+        else:
+            over_scale = scale
+            if best is not None and encodes >= SHRINK_MAX_ENCODES:
+                return best
+            if max(image.size) * scale < 16:
+                # 더 줄일 수 없다. 넘친 결과를 돌려주지 않는다 (호출한 쪽이 413 등으로 바꾼다).
+                raise ImageBudgetError(f"cannot shrink image to fit {max_bytes} bytes (smallest: {size} bytes)")
+        # 면적에 비례한다고 보고 다음 배율을 잡되, 맞은 배율과 넘친 배율 사이로 제한한다
+        scale = min(1.0, scale * math.sqrt(max_bytes / size) * 0.97)
+        if not fit_scale < scale < over_scale:
+            scale = (fit_scale + over_scale) / 2
+
+
+def write_member_thumbnail(image_data: bytes, memberno: int, size) -> str:
+    os.makedirs(MEMBERPHOTO_DIR, exist_ok=True)
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(image_data)))
+    image.thumbnail(size)
+    thumbnail_path = os.path.join(MEMBERPHOTO_DIR, f"mphoto_{memberno}.png")
+    # 임시 파일에 쓰고 교체한다 (제자리 쓰기는 하드링크된 다른 파일까지 바꾼다)
+    tmp = part_path(Path(thumbnail_path))
+    try:
+        image.save(tmp, format="PNG")
+        os.replace(tmp, thumbnail_path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return thumbnail_path
+
+
+def member_thumbnail_from_file(path: Path, memberno: int) -> str:
+    # 워커 프로세스에서 파일을 읽어 100KB 이하로 줄인 뒤 회원 썸네일(200x300)을 쓴다.
+    contents = path.read_bytes()
+    if len(contents) > 102400:
+        contents = shrink_image(contents, 102400)
+    return write_member_thumbnail(contents, memberno, (200, 300))
+
+
+def rotate_photo_file(path: Path, url_prefix: str) -> dict:
+    # 시계 방향 90도 회전 후 파생 이미지를 다시 만든다.
+    # JPEG 은 EXIF 방향 값만 바꿔서 압축 데이터를 다시 인코딩하지 않는다 (화질 손실 없음).
+    tmp = part_path(path)
+    data = path.read_bytes()
+    try:
+        rotated = None
+        if data[:2] == b"\xff\xd8":
+            _, offset, fmt = jpeg_orientation(data)
+            current = struct.unpack(fmt, data[offset:offset + 2])[0] if offset is not None else 1
+            rotated = set_jpeg_orientation(data, ORIENTATION_CW.get(current, 6))
+        if rotated is not None:
+            tmp.write_bytes(rotated)
+        else:
+            with Image.open(path) as img:
+                fmt = img.format
+                out = ImageOps.exif_transpose(img).transpose(Image.ROTATE_270)
+                out.save(tmp, format=fmt, **({"quality": 95} if fmt in ("JPEG", "WEBP") else {}))
+        os.replace(tmp, path)  # 하드링크로 공유 중인 중복 사진은 건드리지 않는다
+    except BaseException:
+        # 실패하면 반쯤 쓴 .part 파일을 사진 폴더에 남기지 않는다
+        tmp.unlink(missing_ok=True)
+        raise
+    return make_variants(path, url_prefix)
+
+
+def read_photo_meta(path: Path, content_hash: str | None = None) -> dict:
+    # 업로드 중에 계산한 해시가 있으면 파일을 다시 읽지 않는다.
+    if content_hash is None:
+        h = hashlib.sha256()
+        with path.open("rb") as f:
+            for chunk in iter(lambda: f.read(READ_CHUNK), b""):
+                h.update(chunk)
+        content_hash = h.hexdigest()
+    try:
+        with Image.open(path) as img:
+            width, height = display_size(img)
+    except Exception:
+        width = height = None
+    return {"fileSize": path.stat().st_size, "width": width, "height": height, "contentHash": content_hash}
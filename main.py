@@ -4,31 +4,46 @@ from collections import defaultdict
 from fastapi.templating import Jinja2Templates
 from fastapi import UploadFile, File, Body, Query
 from fastapi.responses import JSONResponse
-import shutil
 from fastapi import FastAPI, Request, Depends, HTTPException, Form, Response
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.responses import HTMLResponse, RedirectResponse
-from starlette.staticfiles import StaticFiles
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+from starlette.datastructures import Headers
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 import dotenv
-from sqlalchemy import text
-import re
+from sqlalchemy import text, insert
 from typing import List
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy import Integer, DateTime, ForeignKey,CheckConstraint, String
-from datetime import datetime, date
+from datetime import datetime, date, timedelta, timezone
 from sqlalchemy.orm import DeclarativeBase
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, FileResponse
 import asyncio
 import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import time
 from fastapi.encoders import jsonable_encoder
-from PIL import Image
-import io
+from jinja2.utils import htmlsafe_json_dumps
 import os
 import base64
+import hashlib
+import functools
+import uuid
+import mimetypes
+import stat
 from pydantic import BaseModel
+from imageTools import (MEMBERPHOTO_DIR, VARIANT_WIDTHS, VARIANT_FORMATS, part_path, variant_path, make_variants,
+                        link_photo, remove_variants, normalize_orientation,
+                        member_thumbnail_from_file, rotate_photo_file, read_photo_meta, ImageBudgetError)
+from staticTools import (STATIC_ENCODINGS, STATIC_HASHED, STATIC_IMMUTABLE, static_manifest, static_url,
+                         read_static_manifest)
+from responseTools import FastJSONResponse, CompressionMiddleware, accepted_encodings, etag_matches
+from sseHub import SseHub, MemorySseBroker, RedisSseBroker
+from histTools import HIST_SECTIONS, HIST_PLACEHOLDERS, natural_sort_key, load_hist_manifest
+from photoIndex import PHOTO_DIR, GSTB_DIR, PhotoIndex, parse_ephoto_name, parse_gstbook_name
 
 dotenv.load_dotenv()
 DATABASE_URL = os.getenv("dburl")
@@ -41,7 +56,8 @@ engine = create_async_engine(
 
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
-app = FastAPI()
+
+app = FastAPI(default_response_class=FastJSONResponse)
 
 app.add_middleware(SessionMiddleware, secret_key="supersecretkey")
 app.add_middleware(
@@ -52,12 +68,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 templates = Jinja2Templates(directory="templates", context_processors=[lambda request: {"session": request.session},],)
-app.mount("/static", StaticFiles(directory="static"), name="static")
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    # Accept-Encoding 에 맞는 .br/.gz 압축본이 옆에 있으면 그것을 보낸다. 해시 파일명은 immutable 로 캐시.
+    async def get_response(self, path: str, scope) -> Response:
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304) and STATIC_HASHED.match(path):
+            response.headers["Cache-Control"] = STATIC_IMMUTABLE
+        return response
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        variants = []
+        for encoding, suffix in STATIC_ENCODINGS:
+            try:
+                variants.append((encoding, f"{full_path}{suffix}", os.stat(f"{full_path}{suffix}")))
+            except OSError:
+                continue
+        chosen = next((v for v in variants if v[0] in accepted), None)
+        if chosen is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, method=scope["method"])
+        else:
+            encoding, path, st = chosen
+            media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+            response = FileResponse(path, status_code=status_code, stat_result=st, method=scope["method"],
+                                    media_type=media_type)
+            response.headers["Content-Encoding"] = encoding
+        if variants:
+            response.headers["Vary"] = "Accept-Encoding"
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+templates.env.globals.update(static_url=static_url)
+app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
 app.mount("/thumbnails", StaticFiles(directory="static/img/members/"), name="thumbnails")
-MEMBERPHOTO_DIR = "./static/img/members"
 BASE_DIR = Path(__file__).resolve().parent
-PHOTO_DIR = Path("./static/img/event_photos")
-GSTB_DIR = Path("./static/img/gstbook")
 ALLOWED_CONTENT_TYPES = {"image/jpeg", "image/png", "image/webp"}
 EXT_BY_CONTENT_TYPE = {
     "image/jpeg": ".jpg",
@@ -65,26 +114,429 @@ EXT_BY_CONTENT_TYPE = {
     "image/webp": ".webp",
 }
 
+# 업로드 한도 (파일 한 개 기준). 요청 본문은 multipart 경계 등을 위해 UPLOAD_OVERHEAD 만큼 더 허용한다.
+PHOTO_MAX_BYTES = int(os.getenv("photoMaxBytes", str(20 * 1024 * 1024)))
+MEMBERPHOTO_MAX_BYTES = int(os.getenv("memberPhotoMaxBytes", str(10 * 1024 * 1024)))
+MEMO_MAX_BYTES = int(os.getenv("memoMaxBytes", str(5 * 1024 * 1024)))
+UPLOAD_OVERHEAD = 64 * 1024
+UPLOAD_CHUNK = 1024 * 1024
+UPLOAD_LIMITS = (
+    ("/api/eventphotoupload/", PHOTO_MAX_BYTES),
+    ("/api/guestbookupload/", PHOTO_MAX_BYTES),
+    ("/api/memberphotoupload", MEMBERPHOTO_MAX_BYTES),
+    ("/uploadmphoto/", MEMBERPHOTO_MAX_BYTES),
+    ("/api/save_memo", MEMO_MAX_BYTES * 4 // 3),  # base64 data URL
+)
+
+
+class UploadLimitMiddleware:
+    # 업로드 경로의 요청 본문 크기 제한. Content-Length 가 넘으면 본문을 읽기 전에 413,
+    # 헤더가 없거나(chunked) 거짓이면 받은 바이트를 세다가 넘는 순간 413 으로 끊는다.
+    def __init__(self, app, limits):
+        self.app = app
+        self.limits = limits
+    def limit_for(self, path: str):
+        for prefix, limit in self.limits:
+            if path.startswith(prefix):
+                return limit + UPLOAD_OVERHEAD
+        return None
+    async def __call__(self, scope, receive, send):
+        limit = self.limit_for(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > limit:
+            response = JSONResponse({"detail": f"Request body too large (max {limit} bytes)"}, status_code=413)
+            return await response(scope, receive, send)
+        received = 0
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail=f"Request body too large (max {limit} bytes)")
+            return message
+        await self.app(scope, limited_receive, send)
+
+
+app.add_middleware(UploadLimitMiddleware, limits=UPLOAD_LIMITS)
+
+# 응답 압축. 작은 응답은 압축해도 이득이 없으므로 COMPRESS_MIN_BYTES 이상만 압축한다.
+COMPRESS_MIN_BYTES = int(os.getenv("compressMinBytes", "1024"))
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+
+
+def write_chunk(f, h, chunk: bytes):
+    h.update(chunk)
+    f.write(chunk)
+
+
+async def save_upload(upload: UploadFile, dest: Path, max_bytes: int) -> dict:
+    # 청크 단위로 임시 파일에 쓰면서 sha256 을 계산하고, 다 받으면 rename 으로 제자리에 놓는다.
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = part_path(dest)
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with tmp.open("wb") as f:
+            while chunk := await upload.read(UPLOAD_CHUNK):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"File too large (max {max_bytes} bytes)")
+                await asyncio.to_thread(write_chunk, f, h, chunk)
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return {"fileSize": size, "contentHash": h.hexdigest()}
+
+
+def write_data_url(data_url: str, dest: Path, max_bytes: int) -> int:
+    # data:image/png;base64,... 를 4의 배수 단위로 나눠 디코드해서 원본 전체를 두 번 들고 있지 않는다.
+    header, encoded = data_url.split(",", 1)
+    if len(encoded) // 4 * 3 > max_bytes:
+        raise HTTPException(status_code=413, detail=f"File too large (max {max_bytes} bytes)")
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = part_path(dest)
+    size = 0
+    try:
+        with tmp.open("wb") as f:
+            for i in range(0, len(encoded), UPLOAD_CHUNK):
+                size += f.write(base64.b64decode(encoded[i:i + UPLOAD_CHUNK]))
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return size
+
+# /photo/{kind}/{name} 라우트와 photo_url 이 쓰는 사진 종류별 (폴더, URL)
+PHOTO_KINDS = {
+    "ephoto": (PHOTO_DIR, "/static/img/event_photos"),
+    "gstbook": (GSTB_DIR, "/static/img/gstbook"),
+    "members": (Path(MEMBERPHOTO_DIR), "/static/img/members"),
+}
+
+
+def pick_variant(src: Path, src_stat: os.stat_result, width: int, accept: str):
+    # 요청 폭 이상인 가장 작은 파생본, 브라우저가 받는 형식(avif > webp) 순. 없으면 원본.
+    # 원본보다 오래된 파생본은 건너뛴다 (회전 직후 파생본을 다시 만드는 동안 옛 방향을 보내지 않도록).
+    target = next((w for w in VARIANT_WIDTHS if w >= width), VARIANT_WIDTHS[-1])
+    for fmt in VARIANT_FORMATS:
+        if f"image/{fmt}" not in accept:
+            continue
+        path = variant_path(src, target, fmt)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        if st.st_mtime_ns >= src_stat.st_mtime_ns:
+            return path, st, f"image/{fmt}"
+    return src, src_stat, None
+
+
+def photo_version(st: os.stat_result) -> str:
+    return f"{st.st_mtime_ns:x}"
+
+
+def photo_url(url: str, width: int = 800) -> str:
+    # /static/img/... 원본 URL 을 폭 지정 /photo/{kind}/{name}?w=&v= URL 로 바꾼다. 그 외 URL 은 그대로.
+    # v 는 원본의 mtime: 회전 등으로 같은 이름의 파일이 바뀌면 URL 도 바뀌어 캐시된 옛 이미지를 쓰지 않는다.
+    for kind, (directory, prefix) in PHOTO_KINDS.items():
+        if url.startswith(prefix + "/"):
+            name = url[len(prefix) + 1:]
+            try:
+                version = f"&v={photo_version((directory / name).stat())}"
+            except OSError:
+                version = ""
+            return f"/photo/{kind}/{name}?w={width}{version}"
+    return url
+
+
+def photo_srcset(url: str) -> str:
+    if photo_url(url) == url:
+        return ""
+    return ", ".join(f"{photo_url(url, w)} {w}w" for w in VARIANT_WIDTHS)
+
+
+templates.env.globals.update(photo_url=photo_url, photo_srcset=photo_srcset)
+
+
+ephoto_index = PhotoIndex(PHOTO_DIR, "/static/img/event_photos", parse_ephoto_name)
+gstbook_index = PhotoIndex(GSTB_DIR, "/static/img/gstbook", parse_gstbook_name)
+
+
+hist_gallery: dict[str, list] = {}
+
+
+def gstbook_page_tags(filename: str) -> tuple[str, ...]:
+    # 방명록 사진 하나가 바뀌면 목록 페이지와 그 날짜의 타일뷰만 무효화한다
+    key = parse_gstbook_name(filename)
+    return ("gstbook", f"gstbook:{key[1]}") if key else ("gstbook",)
+
 
 class MemoRequest(BaseModel):
     reservNo: int
     image: str
 
 
-class SseHub:
+SSE_BROKER_URL = os.getenv("sse_broker")
+hub = SseHub(RedisSseBroker(SSE_BROKER_URL) if SSE_BROKER_URL else MemorySseBroker())
+
+
+class FlightAborted(Exception):
+    pass
+
+
+class SingleFlight:
+    # 같은 키로 동시에 들어온 조회는 먼저 온 요청(리더)의 DB 조회 하나를 같이 기다린다. 결과는 보관하지 않는다.
+    # 리더 요청이 취소되면 기다리던 요청들은 각자 자기 세션으로 다시 조회한다.
     def __init__(self):
-        self.queues: set[asyncio.Queue] = set()
-    def connect(self) -> asyncio.Queue:
-        q = asyncio.Queue()
-        self.queues.add(q)
-        return q
-    def disconnect(self, q: asyncio.Queue):
-        self.queues.discard(q)
-    async def broadcast(self, event: str, data: dict):
-        msg = {"event": event, "data": data}
-        for q in list(self.queues):
-            await q.put(msg)
-hub = SseHub()
+        self.calls: dict[tuple, asyncio.Future] = {}
+        self.leaders = 0
+        self.shared = 0
+        self.aborted = 0
+    async def do(self, key: tuple, fn, *args):
+        fut = self.calls.get(key)
+        if fut is not None:
+            self.shared += 1
+            try:
+                return await asyncio.shield(fut)
+            except FlightAborted:
+                return await fn(*args)
+        fut = asyncio.get_running_loop().create_future()
+        self.calls[key] = fut
+        self.leaders += 1
+        try:
+            result = await fn(*args)
+        except asyncio.CancelledError:
+            self.aborted += 1
+            fut.set_exception(FlightAborted())
+            fut.exception()  # 기다리는 요청이 없어도 경고가 남지 않게
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            if self.calls.get(key) is fut:
+                del self.calls[key]
+    def forget(self, *kinds: str):
+        # 쓰기 이후에 들어온 요청이 쓰기 전에 시작된 조회에 합류하지 않게 한다
+        for key in [key for key in self.calls if key[0] in kinds]:
+            del self.calls[key]
+    def stats(self) -> dict:
+        return {"in_flight": len(self.calls), "leaders": self.leaders, "shared": self.shared, "aborted": self.aborted}
+
+
+single_flight = SingleFlight()
+
+
+class RefCache:
+    # 클럽/직책/서클/회원 같은 기준 데이터용 TTL 캐시. 쓰기 라우트에서 해당 키만 지운다.
+    def __init__(self, ttl: float = 600.0):
+        self.ttl = ttl
+        self.entries: dict[str, tuple[float, object]] = {}
+        self.hits: dict[str, int] = defaultdict(int)
+        self.misses: dict[str, int] = defaultdict(int)
+        self.invalidations: dict[str, int] = defaultdict(int)
+        self.generations: dict[str, int] = defaultdict(int)
+    def get(self, key: str):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses[key] += 1
+            return None
+        self.hits[key] += 1
+        return entry[1]
+    def set(self, key: str, value):
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        return value
+    def invalidate(self, *keys: str):
+        for key in keys:
+            self.entries.pop(key, None)
+            self.invalidations[key] += 1
+            self.generations[key] += 1
+            single_flight.forget(f"ref:{key}")
+    def cached(self, key: str):
+        # 조회 함수용 데코레이터. 캐시에 없을 때만 조회하고, 동시에 빈 캐시를 만난 요청들은 조회 하나를 공유한다.
+        # 조회 중에 무효화되면 그 결과는 캐시에 넣지 않는다.
+        def decorator(fetch):
+            @functools.wraps(fetch)
+            async def wrapper(db: AsyncSession):
+                value = self.get(key)
+                if value is not None:
+                    return value
+                generation = self.generations[key]
+                value = await single_flight.do((f"ref:{key}",), fetch, db)
+                if generation == self.generations[key]:
+                    self.set(key, value)
+                return value
+            return wrapper
+        return decorator
+    def stats(self) -> dict:
+        keys = set(self.hits) | set(self.misses) | set(self.entries)
+        return {
+            key: {
+                "hits": self.hits[key],
+                "misses": self.misses[key],
+                "invalidations": self.invalidations[key],
+                "cached": key in self.entries,
+            }
+            for key in sorted(keys)
+        }
+
+
+ref_cache = RefCache(ttl=float(os.getenv("refCacheTtl", "600")))
+WORKER_ID = uuid.uuid4().hex  # 자기가 보낸 워커 간 알림을 구분하는 용도
+
+
+async def invalidate_ref(*keys: str):
+    # 이 워커의 캐시는 바로 지우고 다른 워커에는 브로커로 알린다.
+    # 알림이 실패하면 다른 워커는 최대 refCacheTtl 동안 옛 값을 쓴다.
+    ref_cache.invalidate(*keys)
+    try:
+        await hub.notify("ref_invalidate", {"keys": list(keys), "origin": WORKER_ID})
+    except Exception as e:
+        print(f"ref_invalidate notify failed: {e}")
+
+
+def on_ref_invalidate(msg: dict):
+    if msg["event"] == "ref_invalidate" and msg["data"].get("origin") != WORKER_ID:
+        ref_cache.invalidate(*msg["data"]["keys"])
+
+
+hub.control_listeners.append(on_ref_invalidate)
+
+
+class PageCache:
+    # 공개 페이지의 렌더링 결과 캐시 (경로+쿼리 -> 본문, ETag). 쓰기 라우트가 태그로 무효화한다.
+    # 로그인 세션이 있으면 상단 메뉴가 달라지므로 캐시하지 않는다. ttl 은 외부 파일 변경 대비.
+    def __init__(self, ttl: float = 300.0, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: dict[str, tuple] = {}  # key -> (만료 시각, 본문, media_type, etag, tags)
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+    @staticmethod
+    def key(request: Request) -> str | None:
+        if request.session.get("vote_user_No"):
+            return None
+        return f"{request.url.path}?{request.url.query}"
+    @staticmethod
+    def headers(etag: str) -> dict:
+        # 200 은 CompressionMiddleware 가 압축하면서 약한 ETag 로 바꾸므로 처음부터 약한 ETag 를 쓴다.
+        # 그래야 304 와 200(압축 여부와 무관)이 같은 ETag 를 보낸다.
+        return {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    def lookup(self, request: Request) -> Response | None:
+        key = self.key(request)
+        if key is None:
+            return None
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+        _, body, media_type, etag, _ = entry
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=self.headers(etag))
+        self.hits += 1
+        return Response(body, media_type=media_type, headers=self.headers(etag))
+    def store(self, request: Request, response: Response, *tags: str) -> Response:
+        key = self.key(request)
+        if key is None or response.status_code != 200:
+            return response
+        etag = f'W/"{hashlib.sha1(response.body).hexdigest()[:20]}"'
+        self.entries.pop(key, None)
+        if len(self.entries) >= self.max_entries:
+            self.entries.pop(next(iter(self.entries)))
+        self.entries[key] = (time.monotonic() + self.ttl, response.body, response.media_type, etag, tags)
+        response.headers.update(self.headers(etag))
+        return response
+    def invalidate(self, *tags: str):
+        stale = [key for key, entry in self.entries.items() if set(tags) & set(entry[4])]
+        for key in stale:
+            del self.entries[key]
+        self.invalidations += len(stale)
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "invalidations": self.invalidations,
+        }
+
+
+page_cache = PageCache(ttl=float(os.getenv("pageCacheTtl", "300")))
+
+
+class ImagePool:
+    # Pillow 디코드/리사이즈/인코딩 전용 프로세스 풀. 이벤트 루프는 결과만 기다린다.
+    # 대기 작업이 max_pending 을 넘으면 503, timeout 초 안에 끝나지 않으면 504 를 돌려준다.
+    # 시간 초과된 작업은 아직 시작 전이면 취소되고, 이미 도는 중이면 워커에서 끝까지 돈다.
+    # pending 은 요청이 아니라 작업이 실제로 끝날 때 줄이므로 도는 중인 작업도 한도에 포함된다.
+    def __init__(self, workers: int = 2, max_pending: int = 16, timeout: float = 60.0):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.executor: ProcessPoolExecutor | None = None
+        self.pending = 0
+        self.done = 0
+        self.rejected = 0
+        self.timeouts = 0
+    def start(self):
+        if self.executor is None:
+            # fork 대신 spawn: 이벤트 루프/DB 풀 스레드를 복제하지 않는다.
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+    def stop(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Image processing queue is full, retry later")
+        self.start()
+        loop = asyncio.get_running_loop()
+        job = self.executor.submit(fn, *args)
+        self.pending += 1
+        job.add_done_callback(lambda _: self._on_done(loop))
+        try:
+            # 기다림이 취소되면(시간 초과) job.cancel() 이 전달된다. 이미 실행 중이면 취소되지 않는다.
+            return await asyncio.wait_for(asyncio.wrap_future(job), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise HTTPException(status_code=504, detail="Image processing timed out")
+    def _on_done(self, loop):
+        # 풀 관리 스레드에서 불린다. 종료 중이라 루프가 닫혔으면 셀 필요가 없다.
+        try:
+            loop.call_soon_threadsafe(self._finished)
+        except RuntimeError:
+            pass
+    def _finished(self):
+        self.pending -= 1
+        self.done += 1
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "done": self.done,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+
+image_pool = ImagePool(
+    workers=int(os.getenv("imageWorkers", "2")),
+    max_pending=int(os.getenv("imageMaxPending", "16")),
+    timeout=float(os.getenv("imageTimeout", "60")),
+)
 
 
 class Base(DeclarativeBase):
@@ -100,6 +552,21 @@ class RegReservIn(BaseModel):
 class RegReservOut(BaseModel):
     reservNo: int
 
+class RegReservBatchItem(RegReservIn):
+    clubNo: int | None = None
+    circleNo: int | None = None
+
+class RegReservBatchIn(BaseModel):
+    items: List[RegReservBatchItem]
+
+class RegReservBatchResult(BaseModel):
+    index: int
+    reservNo: int | None = None
+    error: str | None = None
+
+class RegReservBatchOut(BaseModel):
+    results: List[RegReservBatchResult]
+
 class VoteReserv(Base):
     __tablename__ = "voteReserv"
     reservNo: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -108,6 +575,7 @@ class VoteReserv(Base):
     reservFrom: Mapped["datetime"] = mapped_column(DateTime, nullable=False)  # DateTime
     visitorCount: Mapped[int] = mapped_column(Integer, nullable=False)
     reservMemo: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    modDate: Mapped["datetime | None"] = mapped_column(DateTime, nullable=True, default=datetime.now)
     __table_args__ = (
         CheckConstraint(
             "(clubNo IS NULL) <> (circleNo IS NULL)",
@@ -116,6 +584,23 @@ class VoteReserv(Base):
     )
 
 
+class VotePhoto(Base):
+    __tablename__ = "votePhoto"
+    photoNo: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    photoKind: Mapped[str] = mapped_column(String(5), nullable=False)  # EPHTO: 행사사진, GSTBK: 방명록
+    reservNo: Mapped[int] = mapped_column(Integer, nullable=False)
+    gdate: Mapped[str | None] = mapped_column(String(8), nullable=True)
+    fileName: Mapped[str] = mapped_column(String(255), nullable=False)
+    fileSize: Mapped[int] = mapped_column(Integer, nullable=False)
+    width: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    height: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    contentHash: Mapped[str] = mapped_column(String(64), nullable=False)
+    variants: Mapped[str | None] = mapped_column(String(2000), nullable=True)  # 파생 이미지 경로 JSON
+    attrib: Mapped[str] = mapped_column(String(10), nullable=False, default="1000010000")
+    regDate: Mapped["datetime"] = mapped_column(DateTime, nullable=False, default=datetime.now)
+    modDate: Mapped["datetime | None"] = mapped_column(DateTime, nullable=True)
+
+
 class VisitMembers(Base):
     __tablename__ = "visitMembers"
     visitNo: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -123,39 +608,6 @@ class VisitMembers(Base):
     memberNo: Mapped[int] = mapped_column(Integer, nullable=False)
 
 
-async def resize_image_if_needed(contents: bytes, max_bytes: int = 314572) -> bytes:
-    if len(contents) <= max_bytes:
-        return contents
-    image = Image.open(io.BytesIO(contents))
-    format = image.format if image.format else 'JPEG'
-    quality = 85  # JPEG의 경우
-    for trial in range(10):
-        buffer = io.BytesIO()
-        save_kwargs = {'format': format}
-        if format.upper() in ['JPEG', 'JPG']:
-            save_kwargs['quality'] = quality
-            save_kwargs['optimize'] = True
-        image.save(buffer, **save_kwargs)
-        data = buffer.getvalue()
-        if len(data) <= max_bytes:
-            return data
-        if format.upper() in ['JPEG', 'JPG'] and quality > 30:
-            quality -= 10
-        else:
-            w, h = image.size
-            image = image.resize((int(w * 0.9), int(h * 0.9)), Image.LANCZOS)
-    return data
-
-
-async def save_memberPhoto(image_data: bytes, memberno: int, size=(200, 300)):
-    os.makedirs(MEMBERPHOTO_DIR, exist_ok=True)
-    image = Image.open(io.BytesIO(image_data))
-    image.thumbnail(size)
-    thumbnail_path = os.path.join(MEMBERPHOTO_DIR, f"mphoto_{memberno}.png")
-    image.save(thumbnail_path, format="PNG")
-    return thumbnail_path
-
-
 def dateno_time_to_datetime(dateno: str, visit_time: str) -> datetime:
     if not dateno or len(dateno) < 4:
         raise ValueError("invalid dateno")
@@ -167,21 +619,93 @@ def dateno_time_to_datetime(dateno: str, visit_time: str) -> datetime:
     return datetime(y, mm, dd, hh, mi, 0)
 
 
-def next_negative_index(event_no: int, directory: Path) -> int:
-    pattern = re.compile(rf"^{re.escape(str(event_no))}-(\-?\d+)\..+$")
-    indices = []
-    for p in directory.iterdir():
-        if not p.is_file():
+async def catalog_photo(kind: str, filename: str, path: Path, reservno: int, gdate: str | None, db: AsyncSession,
+                        variants: dict | None = None, content_hash: str | None = None):
+    meta = await image_pool.run(read_photo_meta, path, content_hash)
+    db.add(VotePhoto(photoKind=kind, fileName=filename, reservNo=reservno, gdate=gdate,
+                     variants=json.dumps(variants) if variants else None, **meta))
+    await db.commit()
+
+
+CATALOG_DIRS = {
+    "EPHTO": (PHOTO_DIR, "/static/img/event_photos"),
+    "GSTBK": (GSTB_DIR, "/static/img/gstbook"),
+}
+
+
+async def dedupe_upload(kind: str, reservno: int, gdate: str | None, save_path: Path, content_hash: str,
+                        db: AsyncSession):
+    # 같은 내용(sha256)의 사진이 이미 있으면:
+    #  - 같은 예약(방명록은 같은 날짜)에 있으면 그 파일명을 돌려준다 (재업로드) -> (fileName, None)
+    #  - 다른 곳에 있으면 save_path 를 그 파일의 하드링크로 바꾼다 -> (None, 파생 이미지 dict 또는 None)
+    query = text("""select photoKind, reservNo, gdate, fileName from votePhoto
+                    where contentHash = :hash and attrib not like :attpatt order by photoNo""")
+    result = await db.execute(query, {"hash": content_hash, "attpatt": "%XXX%"})
+    rows = [row for row in result.fetchall() if (CATALOG_DIRS[row[0]][0] / row[3]).is_file()]
+    for row in rows:
+        if row[0] == kind and row[1] == reservno and row[2] == gdate:
+            return row[3], None
+    for row in rows:
+        try:
+            return None, link_photo(CATALOG_DIRS[row[0]][0] / row[3], save_path, CATALOG_DIRS[kind][1])
+        except OSError:
             continue
-        m = pattern.match(p.name)
-        if m:
-            try:
-                indices.append(int(m.group(1)))
-            except ValueError:
-                pass
-    if not indices:
-        return -1
-    return min(indices)
+    return None, None
+
+
+async def update_photo_meta(kind: str, filename: str, path: Path, db: AsyncSession, variants: dict | None = None):
+    meta = await image_pool.run(read_photo_meta, path)
+    query = text("""update votePhoto set fileSize = :fileSize, width = :width, height = :height, contentHash = :contentHash,
+                    variants = :variants, modDate = :now
+                    where photoKind = :kind and fileName = :fname and attrib not like :attpatt""")
+    await db.execute(query, {**meta, "variants": json.dumps(variants) if variants else None, "now": datetime.now(),
+                             "kind": kind, "fname": filename, "attpatt": "%XXX%"})
+    await db.commit()
+
+
+async def uncatalog_photo(kind: str, filename: str, db: AsyncSession):
+    query = text("update votePhoto set attrib = :attr, modDate = :now where photoKind = :kind and fileName = :fname")
+    await db.execute(query, {"attr": "XXXDLXXXDL", "now": datetime.now(), "kind": kind, "fname": filename})
+    await db.commit()
+
+
+async def get_photo_events(kind: str, db: AsyncSession):
+    # 사진이 있는 예약 목록: votePhoto(photoKind, reservNo) 인덱스 + voteReserv 조인 한 번
+    query = text("""
+                 SELECT a.reservNo, a.reservFrom, b.circleName, c.clubName
+                 FROM voteReserv a
+                          LEFT JOIN lionsCircle b ON a.circleNo = b.circleNo
+                          LEFT JOIN lionsClub c ON a.clubNo = c.clubNo
+                 WHERE a.reservNo IN (SELECT p.reservNo FROM votePhoto p
+                                      WHERE p.photoKind = :kind AND p.attrib NOT LIKE :attpatt)
+                 ORDER BY a.reservFrom DESC
+                 """)
+    result = await db.execute(query, {"kind": kind, "attpatt": "%XXX%"})
+    rows = result.fetchall()
+    events = []
+    for row in rows:
+        dt = row[1]
+        dt_str = dt.strftime("%Y-%m-%d %H:%M") if hasattr(dt, "strftime") else str(dt)
+        name = row[2] or row[3] or "알 수 없음"
+        events.append({
+            "reservNo": row[0],
+            "label": f"[{dt_str}] {name} (예약번호: {row[0]})"
+        })
+    return events
+
+
+async def get_photo_list(kind: str, reservno: int, url_prefix: str, db: AsyncSession):
+    query = text("""
+                 SELECT fileName, width, height
+                 FROM votePhoto
+                 WHERE photoKind = :kind AND reservNo = :reservno AND attrib NOT LIKE :attpatt
+                 """)
+    result = await db.execute(query, {"kind": kind, "reservno": reservno, "attpatt": "%XXX%"})
+    # 파일명 안의 번호 순 (7-2.jpg 가 7-10.jpg 보다 앞). SQL ORDER BY 는 문자열 순이라 쓰지 않는다.
+    rows = sorted(result.fetchall(), key=lambda row: natural_sort_key(row[0]))
+    return [{"filename": row[0], "url": f"{url_prefix}/{row[0]}", "thumb": photo_url(f"{url_prefix}/{row[0]}", 320),
+             "width": row[1], "height": row[2]}
+            for row in rows]
 
 
 async def get_db():
@@ -199,16 +723,211 @@ async def get_reservations(candino: int,db: AsyncSession):
         raise HTTPException(status_code=500, detail="Database query failed(RESERV_LIST)")
 
 
-async def get_apireserv(db: AsyncSession):
+# modDate 는 문장 실행 시각이지 커밋 시각이 아니다. 늦게 커밋된 변경은 이미 지나간 modDate 를 가질 수 있으므로
+# 변경분 조회는 since 보다 이만큼 앞에서부터 다시 읽는다 (겹친 행은 클라이언트가 reservNo 로 덮어쓴다).
+# 가장 긴 예약 쓰기 트랜잭션보다 길게 잡는다.
+RESERV_SINCE_MARGIN = timedelta(seconds=float(os.getenv("reservSinceMargin", "60")))
+
+
+def reserv_version(dt) -> int:
+    # 스케줄 버전 = modDate(ms). 클라이언트는 마지막 버전을 since 로 돌려준다.
+    # modDate(naive DATETIME) 를 UTC 로 보고 변환해서 서버 TZ/서머타임과 무관하게 왕복한다.
+    if not hasattr(dt, "timestamp"):
+        return 0
+    return int(dt.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def reserv_version_datetime(version: int) -> datetime:
     try:
-        query = text("select a.*, b.circleName, c.clubName from voteReserv a left join lionsCircle b on a.circleNo = b.circleNo left join lionsaddr.lionsClub c on a.clubNo = c.clubNo where a.attrib not like :attpatt order by a.reservFrom")
-        result = await db.execute(query, {"attpatt": "%XXX%"})
-        reserv_list = result.fetchall()
-        return reserv_list
+        return datetime.fromtimestamp(version / 1000, timezone.utc).replace(tzinfo=None)
+    except (OverflowError, OSError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid since")
+
+
+RESERV_VIEW_SQL = ("select a.reservNo, a.reservFrom, a.visitorCount, a.reservMemo, b.circleName, c.clubName, a.attrib, a.modDate "
+                   "from voteReserv a left join lionsCircle b on a.circleNo = b.circleNo left join lionsaddr.lionsClub c on a.clubNo = c.clubNo ")
+
+
+class ReservView:
+    # 뷰어 화면/API/SSE 가 함께 쓰는 예약 한 건. RESERV_VIEW_SQL 의 컬럼 순서를 따른다.
+    __slots__ = ("reservNo", "reservFrom", "visitCnt", "reservMemo", "visitorName", "status", "modDate")
+    def __init__(self, row):
+        self.reservNo = row[0]
+        dt = row[1]
+        self.reservFrom = dt.isoformat(timespec="minutes") if hasattr(dt, "isoformat") else str(dt)
+        self.visitCnt = row[2]
+        self.reservMemo = row[3]
+        self.visitorName = (row[4] or row[5]) or ""
+        self.status = row[6]
+        self.modDate = row[7]
+    def as_dict(self) -> dict:
+        return {"reservNo": self.reservNo, "reservFrom": self.reservFrom, "visitCnt": self.visitCnt,
+                "reservMemo": self.reservMemo, "visitorName": self.visitorName, "status": self.status}
+
+
+async def get_reserv_version(db: AsyncSession) -> int:
+    try:
+        result = await db.execute(text("select max(modDate) from voteReserv"))
+        return reserv_version(result.scalar())
+    except:
+        raise HTTPException(status_code=500, detail="Database query failed(RESERV_VERSION)")
+
+
+def schedule_window(window: str | None = None, start: date | None = None, end: date | None = None):
+    # 조회 구간 [시작, 끝). today = 오늘, week = 이번 ISO 주(월~일), start/end = 날짜 범위(끝 포함)
+    if start or end:
+        start = start or end
+        end = end or start
+    elif window == "today":
+        start = end = date.today()
+    elif window == "week":
+        start = date.today() - timedelta(days=date.today().weekday())
+        end = start + timedelta(days=6)
+    else:
+        return None
+    return datetime.combine(start, datetime.min.time()), datetime.combine(end + timedelta(days=1), datetime.min.time())
+
+
+def window_dict(win) -> dict | None:
+    # 템플릿 JS 에서 쓰는 구간 정보 (reservFrom 문자열과 바로 비교 가능한 형식)
+    if win is None:
+        return None
+    return {
+        "from": win[0].isoformat(timespec="minutes"),
+        "to": win[1].isoformat(timespec="minutes"),
+        "start": win[0].date().isoformat(),
+        "end": (win[1] - timedelta(days=1)).date().isoformat(),
+    }
+
+
+def window_sql(win) -> tuple[str, dict]:
+    if win is None:
+        return "", {}
+    return "and a.reservFrom >= :wfrom and a.reservFrom < :wto ", {"wfrom": win[0], "wto": win[1]}
+
+
+async def get_apireserv(db: AsyncSession, win=None):
+    # 예약 이벤트 직후 모든 대시보드가 같은 조회를 동시에 보내므로 같은 구간의 조회는 하나로 합친다
+    return await single_flight.do(("reserv", win), fetch_apireserv, db, win)
+
+
+async def fetch_apireserv(db: AsyncSession, win=None):
+    # 구간 조건은 (reservFrom, attrib) 인덱스의 range 로 읽는다 (migrations/004). 구간이 없으면 전체 조회.
+    try:
+        cond, params = window_sql(win)
+        query = text(RESERV_VIEW_SQL + "where a.attrib not like :attpatt " + cond + "order by a.reservFrom")
+        result = await db.execute(query, {"attpatt": "%XXX%", **params})
+        return [ReservView(row) for row in result.fetchall()]
     except:
         raise HTTPException(status_code=500, detail="Database query failed(RESERV_LIST)")
 
 
+async def get_apireserv_since(since: int, db: AsyncSession, win=None):
+    return await single_flight.do(("reserv", since, win), fetch_apireserv_since, since, db, win)
+
+
+async def fetch_apireserv_since(since: int, db: AsyncSession, win=None):
+    # 취소 건도 포함해서 내려보내야 클라이언트가 목록에서 지울 수 있다.
+    # RESERV_SINCE_MARGIN 만큼 겹쳐 읽어서 since 이후에 커밋된, 그보다 이른 modDate 의 변경도 놓치지 않는다.
+    cond, params = window_sql(win)
+    query = text(RESERV_VIEW_SQL + "where a.modDate >= :since " + cond + "order by a.reservFrom")
+    result = await db.execute(query, {"since": reserv_version_datetime(since) - RESERV_SINCE_MARGIN, **params})
+    return [ReservView(row) for row in result.fetchall()]
+
+
+async def get_apireserv_one(reservno: int, db: AsyncSession):
+    try:
+        query = text(RESERV_VIEW_SQL + "where a.reservNo = :reservno")
+        result = await db.execute(query, {"reservno": reservno})
+        row = result.fetchone()
+        return ReservView(row) if row else None
+    except:
+        raise HTTPException(status_code=500, detail="Database query failed(RESERV_ONE)")
+
+
+class ScheduleSnapshot:
+    # 스케줄 버전별로 한 번만 조회/직렬화한 결과. 뷰어 4개 화면과 /api/get_reserv 가 같이 쓴다.
+    def __init__(self, version: int, reservs: list[ReservView]):
+        self.version = version
+        self.reservs = reservs
+        self.reservs_json = htmlsafe_json_dumps([r.as_dict() for r in reservs], ensure_ascii=False)
+        self.body = f'{{"reservs":{self.reservs_json},"version":{version},"full":true}}'.encode()
+        self.generation = 0
+        self.checked = time.monotonic()
+
+
+class ScheduleCache:
+    # 예약 이벤트(모든 워커에 전달됨)가 오면 generation 을 올리고, 그 외에는 recheck 초마다 버전만 확인한다.
+    # 스냅샷은 조회 구간(없으면 전체)별로 따로 둔다.
+    def __init__(self, recheck: float = 30.0, max_windows: int = 32):
+        self.recheck = recheck
+        self.max_windows = max_windows
+        self.snapshots: dict = {}
+        self.generation = 0
+        self.lock = asyncio.Lock()
+    def mark_dirty(self, msg: dict | None = None):
+        self.generation += 1
+    def fresh(self, snap) -> bool:
+        return snap is not None and snap.generation == self.generation and time.monotonic() - snap.checked < self.recheck
+    async def get(self, db: AsyncSession, win=None) -> ScheduleSnapshot:
+        snap = self.snapshots.get(win)
+        if self.fresh(snap):
+            return snap
+        async with self.lock:
+            snap = self.snapshots.get(win)
+            if self.fresh(snap):
+                return snap
+            generation = self.generation
+            version = await get_reserv_version(db)
+            if snap is None or snap.version != version:
+                snap = ScheduleSnapshot(version, await get_apireserv(db, win))
+                if win not in self.snapshots and len(self.snapshots) >= self.max_windows:
+                    self.snapshots.pop(next(iter(self.snapshots)))
+                self.snapshots[win] = snap
+            snap.generation = generation
+            snap.checked = time.monotonic()
+            return snap
+
+
+schedule_cache = ScheduleCache()
+hub.listeners.append(schedule_cache.mark_dirty)
+hub.listeners.append(lambda msg: page_cache.invalidate("reserv"))
+hub.listeners.append(lambda msg: single_flight.forget("reserv"))
+
+
+async def get_apireserv_many(reservnos: list[int], db: AsyncSession):
+    try:
+        query = text(RESERV_VIEW_SQL + "where a.reservNo in :reservnos order by a.reservFrom")
+        result = await db.execute(query, {"reservnos": tuple(reservnos)})
+        return [ReservView(row) for row in result.fetchall()]
+    except:
+        raise HTTPException(status_code=500, detail="Database query failed(RESERV_MANY)")
+
+
+async def broadcast_reserv_batch(reservnos: list[int], db: AsyncSession):
+    # 여러 건 등록은 reserv_batch 이벤트 하나로 묶어 보낸다.
+    if not reservnos:
+        return
+    try:
+        reservs = await get_apireserv_many(reservnos, db)
+    except HTTPException as e:
+        print(e.detail)
+        return
+    await hub.broadcast("reserv_batch", {"reservs": [r.as_dict() for r in reservs]})
+
+
+async def broadcast_reserv(event: str, reservno: int, db: AsyncSession):
+    # /api/get_reserv 와 같은 모양의 전체 행을 실어 보낸다.
+    try:
+        reserv = await get_apireserv_one(reservno, db)
+    except HTTPException as e:
+        print(e.detail)
+        return
+    if reserv is None:
+        return
+    await hub.broadcast(event, reserv.as_dict())
+
+
 async def get_club_reserv(clubno:int,db: AsyncSession):
     try:
         query = text("SELECT * FROM voteReserv where attrib not like :attpatt and clubNo = :clubno")
@@ -285,6 +1004,71 @@ where a.clubNo = :clubno""")
     return result
 
 
+async def get_reserv_bundle(reservno: int, db: AsyncSession):
+    # 예약 + 클럽 정보 + 회원수를 한 번에 읽고, 방문자를 한 번 더 읽는다 (2회 왕복).
+    # 클럽 추가정보는 voteClubaddinfo 전체가 아니라 해당 클럽 것만 상관 서브쿼리로 모은다.
+    query = text("""select
+    a.reservNo, a.reservFrom, a.visitorCount, b.circleName, c.clubName, a.reservMemo, a.clubNo, a.circleNo, a.attrib,
+    c.*,
+    (select count(*) from lionsMember m where m.clubNo = a.clubNo) as memberCount,
+    (select
+        group_concat(
+            concat(
+                case x.infoType
+                    when 'SLGAN' then '슬로건: '
+                    when 'STF01' then '회장: '
+                    when 'STF02' then '총무: '
+                    when 'STF03' then '재무: '
+                    when 'ESTMB' then '창립회장: '
+                    when 'ESTMC' then '창립회원수: '
+                    when 'MBCNT' then '현재 회원수: '
+                    when 'AINFO' then '봉사실적: '
+                    else concat(x.infoType, ': ')
+                end,
+                x.infoContent
+            )
+            order by field(x.infoType, 'SLGAN', 'STF01', 'STF02', 'STF03', 'ESTMB', 'ESTMC', 'MBCNT', 'AINFO')
+            separator '\n'
+        )
+     from voteClubaddinfo x
+     where x.clubNo = a.clubNo
+       and x.attrib = :attr
+       and x.infoContent is not null
+       and trim(x.infoContent) <> '') as infoContent
+from voteReserv a
+left join lionsCircle b on a.circleNo = b.circleNo
+left join lionsClub c on a.clubNo = c.clubNo
+where a.reservNo = :reservno""")
+    result = await db.execute(query, {"reservno": reservno, "attr": "1000010000"})
+    row = result.fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Reservation not found")
+    reserv = {"reservNo": row[0], "reservFrom": row[1], "visitCnt": row[2], "reservMemo": row[5], "visitorName": (row[3] or row[4]), "clubNo": row[6], "circleNo": row[7], "attrib": row[8]}
+    clubdtl = []
+    if row[6]:
+        clubdtl = {"clubNo": row[9], "clubName": row[10], "estDate": row[11], "regionNo": row[12], "memberCount": row[-2], "infoContent": row[-1]}
+    visitors = await get_visitors(reservno, db)
+    return reserv, clubdtl, visitors
+
+
+async def get_reserv_clubmembers(reservno: int, db: AsyncSession):
+    # 예약의 clubNo 를 먼저 알 필요 없이 예약번호로 바로 클럽 회원을 읽는다 (동시 실행용)
+    try:
+        query = text("SELECT a.memberNo, a.memberName, a.rankNo, b.rankTitlekor, a.clubNo FROM lionsMember a left join lionsRank b on a.rankNo = b.rankNo where a.clubNo = (select clubNo from voteReserv where reservNo = :reservno)")
+        result = await db.execute(query, {"reservno": reservno})
+        member_list = result.fetchall()
+        return member_list
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail="Database query failed(CLUBMEMBER_LIST)")
+
+
+async def with_session(loader, *args):
+    # 독립 조회를 별도 커넥션에서 동시에 돌리기 위한 헬퍼
+    async with async_session() as session:
+        return await loader(*args, session)
+
+
 async def get_visitors(reservno: int, db: AsyncSession):
     query = text("""select a.memberNo,b.memberName,d.clubName, c.rankTitlekor, e.rightNo, a.visitMemo from visitMembers a left join lionsMember b on a.memberNo = b.memberNo left join lionsRank c on c.rankNo = b.rankNo left join lionsClub d on d.clubNo = b.clubNo 
                     left join voteRight e on a.memberNo = e.memberNo where a.reservNo = :reservno""")
@@ -327,6 +1111,7 @@ async def get_clubdtl(clubno:int,db: AsyncSession):
         raise HTTPException(status_code=500, detail="Database query failed(CLUB_DETAIL)")
 
 
+@ref_cache.cached("allmembers")
 async def get_allmembers(db: AsyncSession):
     try:
         query = text("SELECT a.memberNo, a.memberName, a.rankNo, a.clubNo, b.rankTitlekor, c.clubName FROM lionsMember a left join lionsRank b on a.rankNo = b.rankNo  left join lionsClub c on a.clubNo = c.clubNo where a.clubNo != :cno order by c.clubNo")
@@ -338,6 +1123,7 @@ async def get_allmembers(db: AsyncSession):
         raise HTTPException(status_code=500, detail="Database query failed(ALLMEMBER_LIST)")
 
 
+@ref_cache.cached("distmembers")
 async def get_distmembers(db: AsyncSession):
     try:
         query = text("SELECT a.memberNo, a.memberName, a.rankNo, a.clubNo, b.rankTitlekor, c.clubName FROM lionsMember a "
@@ -351,6 +1137,7 @@ async def get_distmembers(db: AsyncSession):
         raise HTTPException(status_code=500, detail="Database query failed(ALLMEMBER_LIST)")
 
 
+@ref_cache.cached("clubs")
 async def get_clublist(db: AsyncSession):
     try:
         query = text("select a.*, b.infoNo from lionsClub a left join voteClubaddinfo b on a.clubNo = b.clubNo and b.infoType='AINFO' where a.attrib not like :attpatt")
@@ -361,6 +1148,7 @@ async def get_clublist(db: AsyncSession):
         raise HTTPException(status_code=500, detail="Database query failed(CLUBLIST)")
 
 
+@ref_cache.cached("ranks")
 async def get_ranklist(db: AsyncSession):
     try:
         query = text("SELECT * FROM lionsRank WHERE attrib = :attpatt AND rankDiv IN ('DIST', 'CLUB') ORDER BY orderNo DESC")
@@ -372,6 +1160,7 @@ async def get_ranklist(db: AsyncSession):
 
 
 
+@ref_cache.cached("circles")
 async def get_circlelist(db: AsyncSession):
     try:
         query = text("select * from lionsCircle where attrib = :attpatt and circleType=:ctype")
@@ -435,28 +1224,69 @@ async def get_notedtl(noteno:int,db: AsyncSession):
         raise HTTPException(status_code=500, detail="Database query failed(NOTEDETAIL)")
 
 
+@app.on_event("startup")
+async def start_sse_hub():
+    await hub.start()
+
+
+@app.on_event("startup")
+async def build_photo_index():
+    ephoto_index.rebuild()
+    gstbook_index.rebuild()
+
+
+@app.on_event("startup")
+async def build_hist_gallery():
+    hist_gallery.update(await asyncio.to_thread(load_hist_manifest))
+
+
+@app.on_event("startup")
+async def load_static_manifest():
+    static_manifest.update(await asyncio.to_thread(read_static_manifest))
+
+
+@app.on_event("shutdown")
+async def stop_sse_hub():
+    await hub.stop()
+
+
+@app.on_event("shutdown")
+async def stop_image_pool():
+    image_pool.stop()
+
+
 @app.get("/sse/schedule")
 async def sse_schedule(request: Request):
-    q = hub.connect()
+    last_event_id = request.headers.get("last-event-id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    sub = hub.connect(last_event_id)
     async def gen():
         try:
-            yield "event: connected\ndata: {}\n\n"
+            if last_event_id is None:
+                yield f"id: {hub.last_id}\nevent: connected\ndata: {{}}\n\n"
+            else:
+                yield "event: connected\ndata: {}\n\n"
 
+            # ping 은 hub.heartbeat() 가 넣어 준다. 연결 끊김은 StreamingResponse 가 감지해 제너레이터를 취소한다.
             while True:
-                try:
-                    msg = await asyncio.wait_for(q.get(), timeout=15.0)
-                    payload = json.dumps(jsonable_encoder(msg["data"]), ensure_ascii=False)
-                    yield f"event: {msg['event']}\n"
-                    yield f"data: {payload}\n\n"
-
-                except asyncio.TimeoutError:
-                    if await request.is_disconnected():
-                        break
+                msg = await sub.queue.get()
+                if msg["event"] == "ping":
                     yield ": ping\n\n"
+                    continue
+                if msg["event"] == "close":
+                    yield "event: resync\ndata: {}\n\n"
+                    break
+                payload = json.dumps(jsonable_encoder(msg["data"]), ensure_ascii=False)
+                yield f"id: {msg['id']}\nevent: {msg['event']}\n"
+                yield f"data: {payload}\n\n"
+                sub.sent_id = msg["id"]
         except asyncio.CancelledError:
             pass
         finally:
-            hub.disconnect(q)
+            hub.disconnect(sub)
     return StreamingResponse(
         gen(),
         media_type="text/event-stream",
@@ -468,6 +1298,31 @@ async def sse_schedule(request: Request):
     )
 
 
+@app.get("/sse/stats")
+async def sse_stats():
+    return hub.stats()
+
+
+@app.get("/image/stats")
+async def image_stats():
+    return image_pool.stats()
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return ref_cache.stats()
+
+
+@app.get("/cache/pages")
+async def page_cache_stats():
+    return page_cache.stats()
+
+
+@app.get("/cache/flights")
+async def single_flight_stats():
+    return single_flight.stats()
+
+
 @app.get("/favicon.ico")
 async def favicon():
     return {"detail": "Favicon is served at /static/favicon.ico"}
@@ -492,8 +1347,7 @@ async def donereserv(request: Request, reservno: int, db: AsyncSession = Depends
     )
     await db.execute(query, {"upd": "1DONE1DONE", "now": datetime.now(), "reservno": reservno})
     await db.commit()
-    reserv_dict = {"reservNo": reservno, "reservFrom": "", "visitCnt": ""}
-    await hub.broadcast("reserv_updated", reserv_dict)
+    await broadcast_reserv("reserv_updated", reservno, db)
     return JSONResponse(content={"message": "성공적으로 저장되었습니다."})
 
 
@@ -579,8 +1433,7 @@ async def cancel_reservations(reservno: int, db: AsyncSession = Depends(get_db))
             "reservno": reservno,
         })
         await db.commit()
-        reserv_dict = {"reservNo": reservno, "reservFrom":'' , "visitCnt": ''}
-        await hub.broadcast("reserv_deleted", reserv_dict)
+        await broadcast_reserv("reserv_deleted", reservno, db)
         return JSONResponse({"canceled": True})
     except Exception as e:
         return JSONResponse({"canceled": False, "error": str(e)}, status_code=500)
@@ -600,8 +1453,7 @@ async def arrive_reservations(reservno: int, db: AsyncSession = Depends(get_db))
             "reservno": reservno,
         })
         await db.commit()
-        reserv_dict = {"reservNo": reservno, "reservFrom":'' , "visitCnt": ''}
-        await hub.broadcast("reserv_updated", reserv_dict)
+        await broadcast_reserv("reserv_updated", reservno, db)
         return JSONResponse({"arrived": True})
     except Exception as e:
         return JSONResponse({"arrived": False, "error": str(e)}, status_code=500)
@@ -621,8 +1473,7 @@ async def cancl_arrive_reservations(reservno: int, db: AsyncSession = Depends(ge
             "reservno": reservno,
         })
         await db.commit()
-        reserv_dict = {"reservNo": reservno, "reservFrom":'' , "visitCnt": ''}
-        await hub.broadcast("reserv_updated", reserv_dict)
+        await broadcast_reserv("reserv_updated", reservno, db)
         return JSONResponse({"arrived": True})
     except Exception as e:
         return JSONResponse({"arrived": False, "error": str(e)}, status_code=500)
@@ -646,75 +1497,33 @@ async def new_reservations(request: Request,dateno: str, db: AsyncSession = Depe
 
 @app.get("/history", response_class=HTMLResponse)
 async def history(request: Request):
-    hist_dir = "static/assets/hist"
-    def natural_sort_key(s):
-        return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', s)]
-    def get_images(prefix):
-        if not os.path.exists(hist_dir):
-            return []
-        valid_exts = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
-        files = [f for f in os.listdir(hist_dir) if f.startswith(prefix) and f.lower().endswith(valid_exts)]
-        files.sort(key=natural_sort_key)
-        return [f"/static/assets/hist/{f}" for f in files]
-    h01_images = get_images("h1-")
-    h02_images = get_images("h2-")
-    h03_images = get_images("h3-")
-    h04_images = get_images("h4-")
-    h05_images = get_images("h5-")
-    h06_images = get_images("h6-")
-    h07_images = get_images("h7-")
-    if not h01_images:
-        h01_images = ["https://dummyimage.com/800x500/343a40/6c757d"]
-    if not h02_images:
-        h02_images = ["https://dummyimage.com/800x500/5c2a8a/ffffff"]
-    if not h03_images:
-        h03_images = ["https://dummyimage.com/800x500/5c2a8a/ffffff"]
-    if not h04_images:
-        h04_images = ["https://dummyimage.com/800x500/5c2a8a/ffffff"]
-    if not h05_images:
-        h05_images = ["https://dummyimage.com/800x500/5c2a8a/ffffff"]
-    if not h06_images:
-        h06_images = ["https://dummyimage.com/800x500/5c2a8a/ffffff"]
-    if not h07_images:
-        h07_images = ["https://dummyimage.com/800x500/5c2a8a/ffffff"]
-
-    context = {
-        "request": request,
-        "h01_images": h01_images,
-        "h02_images": h02_images,
-        "h03_images": h03_images,
-        "h04_images": h04_images,
-        "h05_images": h05_images,
-        "h06_images": h06_images,
-        "h07_images": h07_images
-    }
-    return templates.TemplateResponse("history/projects.html", context)
+    # 시작 시 읽어 둔 hist_gallery 로만 렌더링한다 (요청마다 폴더를 읽지 않는다)
+    cached = page_cache.lookup(request)
+    if cached is not None:
+        return cached
+    context = {"request": request}
+    for n, section in enumerate(HIST_SECTIONS, 1):
+        images = hist_gallery.get(section)
+        if not images:
+            images = [{"src": HIST_PLACEHOLDERS[section], "srcset": "", "width": None, "height": None}]
+        context[f"h0{n}_images"] = images
+    return page_cache.store(request, templates.TemplateResponse("history/projects.html", context), "hist")
 
 
 @app.get("/guestbook", response_class=HTMLResponse)
 async def history(request: Request):
-    hist_dir = "static/img/gstbook"
-    def natural_sort_key(s):
-        return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', s)]
-    grouped_images = defaultdict(list)
-    if os.path.exists(hist_dir):
-        valid_exts = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
-        # gstb- 로 시작하고 유효한 확장자를 가진 파일만 필터링
-        files = [f for f in os.listdir(hist_dir) if f.startswith("gstb-") and f.lower().endswith(valid_exts)]
-        for f in files:
-            parts = f.split('-')
-            if len(parts) >= 2:
-                date_str = parts[1]
-                grouped_images[date_str].append(f"/static/img/gstbook/{f}")
-    for date_str in grouped_images:
-        grouped_images[date_str].sort(key=natural_sort_key)
-    sorted_dates = sorted(grouped_images.keys(), reverse=True)
+    cached = page_cache.lookup(request)
+    if cached is not None:
+        return cached
+    valid_exts = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
     guestbook_data = []
-    for date_str in sorted_dates:
-        guestbook_data.append({
-            "date": date_str,
-            "images": grouped_images[date_str]
-        })
+    for date_str in gstbook_index.dates():
+        images = [gstbook_index.url(f) for f in gstbook_index.date_files(date_str) if f.lower().endswith(valid_exts)]
+        if images:
+            guestbook_data.append({
+                "date": date_str,
+                "images": images
+            })
     if not guestbook_data:
         guestbook_data = [
             {
@@ -726,7 +1535,7 @@ async def history(request: Request):
         "request": request,
         "guestbook_data": guestbook_data
     }
-    return templates.TemplateResponse("history/guestbook.html", context)
+    return page_cache.store(request, templates.TemplateResponse("history/guestbook.html", context), "gstbook")
 
 
 @app.get("/success", response_class=HTMLResponse)
@@ -738,9 +1547,12 @@ async def success(request: Request):
 
 @app.get("/noname", response_class=HTMLResponse)
 async def success(request: Request):
-    return templates.TemplateResponse(
+    cached = page_cache.lookup(request)
+    if cached is not None:
+        return cached
+    return page_cache.store(request, templates.TemplateResponse(
         "index/index.html", {"request": request, "user_No": request.session.get("user_No")}
-    )
+    ), "static")
 
 
 @app.get("/view_visitors", response_class=HTMLResponse)
@@ -756,12 +1568,11 @@ async def view_visitors(request: Request, db: AsyncSession = Depends(get_db)):
 async def view_visitors(request: Request,reservno:int ,db: AsyncSession = Depends(get_db)):
     if not request.session.get("vote_user_No"):
         return RedirectResponse(url="/login", status_code=303)
-    reserv_dtl = await get_reserv_dtl(reservno, db)
-    cmembers = await get_clubmembers(reserv_dtl["clubNo"], db)
-    visitors = await get_visitors(reservno, db)
-    photo_dir = Path("static/img/event_photos")
-    files = sorted(photo_dir.glob(f"{reservno}-*.jpg"))
-    event_photos = [f"/static/img/event_photos/{p.name}" for p in files]
+    (reserv_dtl, clubdtl, visitors), cmembers = await asyncio.gather(
+        get_reserv_bundle(reservno, db),
+        with_session(get_reserv_clubmembers, reservno),
+    )
+    event_photos = [ephoto_index.url(f) for f in ephoto_index.event_files(reservno) if f.endswith(".jpg")]
     return templates.TemplateResponse("view/reserv_dtl.html", {"request": request, "reserv": reserv_dtl, "visitors": visitors,"event_photos": event_photos, "cmembers": cmembers})
 
 
@@ -769,20 +1580,12 @@ async def view_visitors(request: Request,reservno:int ,db: AsyncSession = Depend
 async def view_visitors(request: Request,reservno:int ,db: AsyncSession = Depends(get_db)):
     if not request.session.get("vote_user_No"):
         return RedirectResponse(url="/login", status_code=303)
-    candino = int(os.getenv("candiNo"))
-    reserv_dtl = await get_reserv_dtl(reservno, db)
-    circleno = reserv_dtl["circleNo"]
-    clubno = reserv_dtl["clubNo"]
-    cmembers = await get_clubmembers(clubno, db) if clubno else []
-    if clubno:
-        clubdtl = await get_club_dtl(clubno, db)
-    else:
-        clubdtl = []
-    visitors = await get_visitors(reservno, db)
-    notes = await get_notelist("CANDI", db)
-    photo_dir = Path("static/img/event_photos")
-    files = sorted(photo_dir.glob(f"{reservno}-*.jpg"))
-    event_photos = [f"/static/img/event_photos/{p.name}" for p in files]
+    (reserv_dtl, clubdtl, visitors), cmembers, notes = await asyncio.gather(
+        get_reserv_bundle(reservno, db),
+        with_session(get_reserv_clubmembers, reservno),
+        with_session(get_notelist, "CANDI"),
+    )
+    event_photos = [ephoto_index.url(f) for f in ephoto_index.event_files(reservno) if f.endswith(".jpg")]
     return templates.TemplateResponse("view/reserv_dtl_candi.html", {"request": request, "reserv": reserv_dtl, "visitors": visitors,"event_photos": event_photos, "clubdtl": clubdtl, "notes":notes, "cmembers":cmembers})
 
 
@@ -790,19 +1593,11 @@ async def view_visitors(request: Request,reservno:int ,db: AsyncSession = Depend
 async def view_visitors(request: Request,reservno:int ,db: AsyncSession = Depends(get_db)):
     if not request.session.get("vote_user_No"):
         return RedirectResponse(url="/login", status_code=303)
-    candino = int(os.getenv("candiNo"))
-    reserv_dtl = await get_reserv_dtl(reservno, db)
-    circleno = reserv_dtl["circleNo"]
-    clubno = reserv_dtl["clubNo"]
-    if clubno :
-        clubdtl = await get_club_dtl(clubno, db)
-    if circleno :
-        clubdtl = []
-    visitors = await get_visitors(reservno, db)
-    notes = await get_notelist("AIDE", db)
-    photo_dir = Path("static/img/event_photos")
-    files = sorted(photo_dir.glob(f"{reservno}-*.jpg"))
-    event_photos = [f"/static/img/event_photos/{p.name}" for p in files]
+    (reserv_dtl, clubdtl, visitors), notes = await asyncio.gather(
+        get_reserv_bundle(reservno, db),
+        with_session(get_notelist, "AIDE"),
+    )
+    event_photos = [ephoto_index.url(f) for f in ephoto_index.event_files(reservno) if f.endswith(".jpg")]
     return templates.TemplateResponse("view/reserv_dtl_aide.html", {"request": request, "reserv": reserv_dtl, "visitors": visitors,"event_photos": event_photos, "clubdtl": clubdtl, "notes":notes})
 
 
@@ -817,22 +1612,10 @@ async def view_visitorssimple(request: Request,reservno:int ,db: AsyncSession =
 async def view_candi(request: Request, db: AsyncSession = Depends(get_db)):
     if not request.session.get("vote_user_No"):
         return RedirectResponse(url="/login", status_code=303)
-    rows = await get_apireserv(db)
-    result = []
-    for row in rows:
-        dt = row[4]
-        reserv_from = dt.isoformat(timespec="minutes") if hasattr(dt, "isoformat") else str(dt)
-        result.append({
-            "reservNo": row[0],
-            "reservFrom": reserv_from,
-            "visitCnt": row[7],
-            "reservMemo": row[8],
-            "visitorName": (row[12] or row[13]) or "",
-            "attrib": row[11],
-        })
+    snapshot = await schedule_cache.get(db)
     return templates.TemplateResponse(
         "templete/candi_view.html",
-        {"request": request, "reservs": result},
+        {"request": request, "reservs_json": snapshot.reservs_json, "version": snapshot.version, "windows": None},
     )
 
 
@@ -840,22 +1623,10 @@ async def view_candi(request: Request, db: AsyncSession = Depends(get_db)):
 async def view_aide(request: Request, db: AsyncSession = Depends(get_db)):
     if not request.session.get("vote_user_No"):
         return RedirectResponse(url="/login", status_code=303)
-    rows = await get_apireserv(db)
-    result = []
-    for row in rows:
-        dt = row[4]
-        reserv_from = dt.isoformat(timespec="minutes") if hasattr(dt, "isoformat") else str(dt)
-        result.append({
-            "reservNo": row[0],
-            "reservFrom": reserv_from,
-            "visitCnt": row[7],
-            "reservMemo": row[8],
-            "visitorName": (row[12] or row[13]) or "",
-            "attrib": row[11],
-        })
+    snapshot = await schedule_cache.get(db)
     return templates.TemplateResponse(
         "templete/aide_view.html",
-        {"request": request, "reservs": result},
+        {"request": request, "reservs_json": snapshot.reservs_json, "version": snapshot.version, "windows": None},
     )
 
 
@@ -868,101 +1639,125 @@ async def view_history(request: Request, db: AsyncSession = Depends(get_db)):
 
 @app.get("/viewer/vision_view", response_class=HTMLResponse)
 async def view_vision(request: Request, db: AsyncSession = Depends(get_db)):
+    cached = page_cache.lookup(request)
+    if cached is not None:
+        return cached
     candino = int(os.getenv("candiNo"))
     reservs = await get_reservations(candino, db)
-    return templates.TemplateResponse("templete/vision_view.html", {"request": request, "reservations": reservs})
+    return page_cache.store(request, templates.TemplateResponse("templete/vision_view.html", {"request": request, "reservations": reservs}),
+                            "reserv")
 
 
 @app.get("/viewer/schedule_today", response_class=HTMLResponse)
 async def view_today(request: Request, db: AsyncSession = Depends(get_db)):
     if not request.session.get("vote_user_No"):
         return RedirectResponse(url="/login", status_code=303)
-    rows = await get_apireserv(db)
-    result = []
-    for row in rows:
-        dt = row[4]
-        reserv_from = dt.isoformat(timespec="minutes") if hasattr(dt, "isoformat") else str(dt)
-        result.append({
-            "reservNo": row[0],
-            "reservFrom": reserv_from,
-            "visitCnt": row[7],
-            "reservMemo": row[8],
-            "visitorName": (row[12] or row[13]) or "",
-            "attrib": row[11],
-        })
+    today = schedule_window("today")
+    windows = [window_dict(today)]
+    snapshot = await schedule_cache.get(db, today)
+    if not snapshot.reservs:
+        # 오늘 예약이 없으면 3월 10일로 대체. 오늘 구간도 계속 받아서 오늘 예약이 생기면 바로 보여 준다.
+        win = schedule_window(start=date(date.today().year, 3, 10))
+        windows.append(window_dict(win))
+        snapshot = await schedule_cache.get(db, win)
     return templates.TemplateResponse(
         "templete/sched_today.html",
-        {"request": request, "reservs": result},
+        {"request": request, "reservs_json": snapshot.reservs_json, "version": snapshot.version, "windows": windows},
     )
 
 
 @app.get("/viewer/schedule_week", response_class=HTMLResponse)
-async def view_week(request: Request, db: AsyncSession = Depends(get_db)):
+async def view_week(request: Request, start: Optional[date] = None, end: Optional[date] = None,
+                    db: AsyncSession = Depends(get_db)):
     if not request.session.get("vote_user_No"):
         return RedirectResponse(url="/login", status_code=303)
-    rows = await get_apireserv(db)
-    result = []
-    for row in rows:
-        dt = row[4]
-        reserv_from = dt.isoformat(timespec="minutes") if hasattr(dt, "isoformat") else str(dt)
-        result.append({
-            "reservNo": row[0],
-            "reservFrom": reserv_from,
-            "visitCnt": row[7],
-            "reservMemo": row[8],
-            "visitorName": (row[12] or row[13]) or "",
-            "attrib": row[11],
-        })
+    win = schedule_window("week", start, end)
+    snapshot = await schedule_cache.get(db, win)
     return templates.TemplateResponse(
         "templete/sched_week.html",
-        {"request": request, "reservs": result},
+        {"request": request, "reservs_json": snapshot.reservs_json, "version": snapshot.version, "windows": [window_dict(win)]},
     )
 
 
 @app.post("/api/eventphotoupload/{eventNo}")
-async def upload_event_photo(eventNo: int, photo: UploadFile = File(...)):
+async def upload_event_photo(eventNo: int, photo: UploadFile = File(...), db: AsyncSession = Depends(get_db)):
     if photo.content_type not in ALLOWED_CONTENT_TYPES:
         raise HTTPException(status_code=415, detail=f"Unsupported content type: {photo.content_type}")
     ext = EXT_BY_CONTENT_TYPE.get(photo.content_type, "")
     if not ext:
         raise HTTPException(status_code=415, detail="Unsupported content type (no extension mapping)")
-    idx = 1
-    while True:
-        filename = f"{eventNo}-{idx}{ext}"
-        save_path = PHOTO_DIR / filename
-        if not save_path.exists():
-            break
-        idx += 1
+    ephoto_index.refresh()
+    filename, save_path, reserved = ephoto_index.allocate(eventNo, None, lambda idx: f"{eventNo}-{idx}{ext}")
     try:
-        with save_path.open("wb") as buffer:
-            shutil.copyfileobj(photo.file, buffer)
+        # 다 받고 방향까지 고친 뒤에만 최종 이름으로 옮긴다 (그 전에는 숨김 예약 파일)
+        stored = await save_upload(photo, reserved, PHOTO_MAX_BYTES)
+        stored["contentHash"] = await image_pool.run(normalize_orientation, reserved) or stored["contentHash"]
+        existing, variants = await dedupe_upload("EPHTO", eventNo, None, save_path, stored["contentHash"], db)
+        if existing is None:
+            if variants is None:
+                if not save_path.exists():  # link_photo 가 하드링크를 놓았으면 그대로 쓴다
+                    os.replace(reserved, save_path)
+                variants = await image_pool.run(make_variants, save_path, ephoto_index.url_prefix)
+            await catalog_photo("EPHTO", filename, save_path, eventNo, None, db, variants, stored["contentHash"])
     except Exception as e:
+        if save_path.exists():
+            remove_variants(save_path)
+            save_path.unlink(missing_ok=True)
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(status_code=500, detail=f"Failed to save file: {e}")
+    finally:
+        reserved.unlink(missing_ok=True)
+    if existing is not None:
+        # 같은 사진 재업로드: 새 파일은 만들지 않고 기존 파일명을 돌려준다
+        filename = existing
+        save_path = PHOTO_DIR / filename
+    else:
+        ephoto_index.add(filename)
     url_path = f"/static/img/event_photos/{filename}"
-    return {"eventNo": eventNo, "filename": filename, "contentType": photo.content_type, "savedPath": str(save_path), "url": url_path}
+    return {"eventNo": eventNo, "filename": filename, "contentType": photo.content_type, "savedPath": str(save_path), "url": url_path,
+            "duplicate": existing is not None}
 
 
 @app.post("/api/guestbookupload/{gdate}/{eventNo}")
-async def upload_guestbook(eventNo: int,gdate:str, photo: UploadFile = File(...)):
+async def upload_guestbook(eventNo: int,gdate:str, photo: UploadFile = File(...), db: AsyncSession = Depends(get_db)):
     if photo.content_type not in ALLOWED_CONTENT_TYPES:
         raise HTTPException(status_code=415, detail=f"Unsupported content type: {photo.content_type}")
     ext = EXT_BY_CONTENT_TYPE.get(photo.content_type, "")
     if not ext:
         raise HTTPException(status_code=415, detail="Unsupported content type (no extension mapping)")
-    idx = 1
-    while True:
-        filename = f"gstb-{gdate}-{eventNo}-{idx}{ext}"
-        save_path = GSTB_DIR / filename
-        if not save_path.exists():
-            break
-        idx += 1
+    gstbook_index.refresh()
+    filename, save_path, reserved = gstbook_index.allocate(eventNo, gdate, lambda idx: f"gstb-{gdate}-{eventNo}-{idx}{ext}")
     try:
-        with save_path.open("wb") as buffer:
-            shutil.copyfileobj(photo.file, buffer)
+        # 다 받고 방향까지 고친 뒤에만 최종 이름으로 옮긴다 (그 전에는 숨김 예약 파일)
+        stored = await save_upload(photo, reserved, PHOTO_MAX_BYTES)
+        stored["contentHash"] = await image_pool.run(normalize_orientation, reserved) or stored["contentHash"]
+        existing, variants = await dedupe_upload("GSTBK", eventNo, gdate, save_path, stored["contentHash"], db)
+        if existing is None:
+            if variants is None:
+                if not save_path.exists():  # link_photo 가 하드링크를 놓았으면 그대로 쓴다
+                    os.replace(reserved, save_path)
+                variants = await image_pool.run(make_variants, save_path, gstbook_index.url_prefix)
+            await catalog_photo("GSTBK", filename, save_path, eventNo, gdate, db, variants, stored["contentHash"])
     except Exception as e:
+        if save_path.exists():
+            remove_variants(save_path)
+            save_path.unlink(missing_ok=True)
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(status_code=500, detail=f"Failed to save file: {e}")
+    finally:
+        reserved.unlink(missing_ok=True)
+    if existing is not None:
+        # 같은 사진 재업로드: 새 파일은 만들지 않고 기존 파일명을 돌려준다
+        filename = existing
+        save_path = GSTB_DIR / filename
+    else:
+        gstbook_index.add(filename)
+        page_cache.invalidate("gstbook", f"gstbook:{gdate}")
     url_path = f"/static/img/gstbook/{filename}"
-    return {"eventNo": eventNo, "filename": filename, "contentType": photo.content_type, "savedPath": str(save_path), "url": url_path}
+    return {"eventNo": eventNo, "filename": filename, "contentType": photo.content_type, "savedPath": str(save_path), "url": url_path,
+            "duplicate": existing is not None}
 
 
 @app.post("/insert_newcircle")
@@ -982,6 +1777,7 @@ async def insert_circ(
         """)
         await db.execute(query, {"circlename": name})
         await db.commit()
+        await invalidate_ref("circles")
         return {"inserted": True}
     except HTTPException:
         raise
@@ -1008,8 +1804,7 @@ async def reg_reserv(clubNo: int, payload: RegReservIn, db: AsyncSession = Depen
         await db.flush()
         db.add_all([VisitMembers(reservNo=vr.reservNo, memberNo=mn) for mn in payload.memberNos])
         await db.commit()
-        reserv_dict = {"reservNo": vr.reservNo, "reservFrom": vr.reservFrom, "visitCnt": vr.visitorCount}
-        await hub.broadcast("reserv_created", reserv_dict)
+        await broadcast_reserv("reserv_created", vr.reservNo, db)
         return RegReservOut(reservNo=vr.reservNo)
     except ValueError as ve:
         await db.rollback()
@@ -1039,8 +1834,7 @@ async def reg_reservc(circleNo: int, payload: RegReservIn, db: AsyncSession = De
         await db.flush()
         db.add_all([VisitMembers(reservNo=vr.reservNo, memberNo=mn) for mn in payload.memberNos])
         await db.commit()
-        reserv_dict = {"reservNo": vr.reservNo, "reservFrom": vr.reservFrom, "visitCnt": vr.visitorCount}
-        await hub.broadcast("reserv_created", reserv_dict)
+        await broadcast_reserv("reserv_created", vr.reservNo, db)
         return RegReservOut(reservNo=vr.reservNo)
     except ValueError as ve:
         await db.rollback()
@@ -1050,6 +1844,52 @@ async def reg_reservc(circleNo: int, payload: RegReservIn, db: AsyncSession = De
         await db.rollback()
         raise HTTPException(status_code=500, detail="DB 저장 중 오류가 발생했습니다.")
 
+@app.post("/reg_reserv_batch", response_model=RegReservBatchOut)
+async def reg_reserv_batch(payload: RegReservBatchIn, db: AsyncSession = Depends(get_db)):
+    # 하루치 방문 일정을 한 번에 등록: 항목별로 검증하고, 통과한 것만 한 트랜잭션에서 INSERT
+    results = [RegReservBatchResult(index=i) for i in range(len(payload.items))]
+    rows = []
+    for i, item in enumerate(payload.items):
+        if (item.clubNo is None) == (item.circleNo is None):
+            results[i].error = "clubNo와 circleNo 중 하나만 지정하세요."
+        elif item.visitorCount != len(item.memberNos):
+            results[i].error = "visitorCount와 선택 인원 수가 다릅니다."
+        elif item.visitorCount <= 0:
+            results[i].error = "방문 회원을 1명 이상 선택하세요."
+        else:
+            try:
+                reserv_from_dt = dateno_time_to_datetime(item.dateno, item.visitTime)
+            except ValueError as ve:
+                results[i].error = str(ve)
+                continue
+            rows.append((i, {
+                "clubNo": item.clubNo,
+                "circleNo": item.circleNo,
+                "reservFrom": reserv_from_dt,
+                "visitorCount": item.visitorCount,
+                "reservMemo": item.reservMemo,
+                "modDate": datetime.now(),
+            }))
+    if not rows:
+        return RegReservBatchOut(results=results)
+    try:
+        # 예약은 한 행씩 넣어 각자의 lastrowid 를 받는다. 다중 행 INSERT 의 번호는
+        # auto_increment_increment > 1 이거나 innodb_autoinc_lock_mode=2 이면 연속이라는 보장이 없다.
+        visit_rows = []
+        for i, row in rows:
+            reserv_no = (await db.execute(insert(VoteReserv).values(row))).lastrowid
+            results[i].reservNo = reserv_no
+            visit_rows.extend({"reservNo": reserv_no, "memberNo": mn} for mn in payload.items[i].memberNos)
+        await db.execute(insert(VisitMembers).values(visit_rows))
+        await db.commit()
+    except Exception as e:
+        print(e)
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="DB 저장 중 오류가 발생했습니다.")
+    await broadcast_reserv_batch([r.reservNo for r in results if r.reservNo], db)
+    return RegReservBatchOut(results=results)
+
+
 @app.get("/circles")
 async def get_circles(db: AsyncSession = Depends(get_db)):
     rows = (await db.execute(text("""
@@ -1058,19 +1898,23 @@ async def get_circles(db: AsyncSession = Depends(get_db)):
         WHERE circleType = 'VOTEC'
         ORDER BY circleName
     """))).all()
-    return [{"id": r[0], "name": r[1]} for r in rows]
+    return FastJSONResponse([{"id": r[0], "name": r[1]} for r in rows])
 
 
 @app.get("/api/get_reserv")
-async def get_reserv(db: AsyncSession = Depends(get_db)):
-    try:
-        rows = await get_apireserv(db)
-        result = [{"reservNo": row[0], "reservFrom": row[4], "visitCnt": row[7], "reservMemo": row[8], "visitorName": (row[12] or row[13]), "status": row[11]} for row in rows]
-    except Exception as e:
-        print(e)
-        result = []
-    finally:
-        return {"reservs": result}
+async def get_reserv(since: Optional[int] = None, window: Optional[str] = None, start: Optional[date] = None,
+                     end: Optional[date] = None, db: AsyncSession = Depends(get_db)):
+    # 조회 실패는 빈 목록이 아니라 에러로 돌려준다. 빈 전체 목록을 200 으로 보내면 클라이언트가 표를 비우고,
+    # 빈 변경분을 보내면 "변경 없음" 으로 받아들인다. 에러면 클라이언트는 지금 목록을 두고 다음에 다시 받는다.
+    win = schedule_window(window, start, end)
+    if not since:
+        snapshot = await schedule_cache.get(db, win)
+        return Response(content=snapshot.body, media_type="application/json")
+    version = since
+    reservs = await get_apireserv_since(since, db, win)
+    for r in reservs:
+        version = max(version, reserv_version(r.modDate))
+    return FastJSONResponse({"reservs": [r.as_dict() for r in reservs], "version": version, "full": False})
 
 
 @app.get("/scribe01", response_class=HTMLResponse)
@@ -1139,9 +1983,12 @@ async def contact(request: Request):
 
 @app.get("/mculture", response_class=HTMLResponse)
 async def mculture(request: Request):
-    return templates.TemplateResponse(
+    cached = page_cache.lookup(request)
+    if cached is not None:
+        return cached
+    return page_cache.store(request, templates.TemplateResponse(
         "history/mculture.html", {"request": request}
-    )
+    ), "static")
 
 
 @app.api_route("/insert_contact/", methods=["POST"])
@@ -1169,6 +2016,7 @@ async def insertinfo(request: Request,clubno ,db: AsyncSession = Depends(get_db)
     ql = text(f"INSERT INTO voteClubaddinfo (clubNo, infoContent) values (:clubno,:infoc)")
     await db.execute(ql, {"clubno": clubno, "infoc": info})
     await db.commit()
+    await invalidate_ref("clubs")
     return JSONResponse(content={"message": "성공적으로 저장되었습니다.", "redirect_url": "/manage_clubs"})
 
 @app.api_route("/insert_note/", methods=["POST"])
@@ -1217,8 +2065,7 @@ async def donereserv(request: Request, reservno: int, db: AsyncSession = Depends
         f"UPDATE voteReserv set attrib = :upd , modDate = :now where reservNo = :reservno ")
     await db.execute(query, {"upd": '1DONE1DONE', "now": datetime.now(), "reservno": reservno})
     await db.commit()
-    reserv_dict = {"reservNo": reservno, "reservFrom": '', "visitCnt": ''}
-    await hub.broadcast("reserv_updated", reserv_dict)
+    await broadcast_reserv("reserv_updated", reservno, db)
 
     return JSONResponse(content={"message": "성공적으로 저장되었습니다."})
 
@@ -1268,10 +2115,17 @@ async def upload_logoimage(request: Request, memberno: int, file: UploadFile = F
     try:
         if not file.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="File type not supported.")
-        contents = await file.read()
-        contents = await resize_image_if_needed(contents, max_bytes=102400)
-        await save_memberPhoto(contents, memberno)
+        tmp = part_path(Path(MEMBERPHOTO_DIR) / f"mphoto_{memberno}.png")
+        try:
+            await save_upload(file, tmp, MEMBERPHOTO_MAX_BYTES)
+            await image_pool.run(member_thumbnail_from_file, tmp, memberno)
+        except ImageBudgetError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        finally:
+            tmp.unlink(missing_ok=True)
         return RedirectResponse(f"/edit_member/{memberno}", status_code=303)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error: {e}")
         return RedirectResponse(f"/edit_member/{memberno}", status_code=303)
@@ -1385,6 +2239,7 @@ async def insertcontact(request: Request, db: AsyncSession = Depends(get_db)):
     await db.execute(query, {"mname": membername, "mclub": clubno,
                              "mrank": rankno})
     await db.commit()
+    await invalidate_ref("distmembers", "allmembers")
     return JSONResponse(content={"message": "성공적으로 저장되었습니다.", "redirect_url": f"/manage_cmembers?clubno={clubno}"})
 
 
@@ -1398,6 +2253,7 @@ async def insertcontact(request: Request, memberno: int, db: AsyncSession = Depe
         f"UPDATE lionsMember SET memberName = :mname, clubNo = :mclub, rankNo = :mrank where memberNo = :memberno ")
     await db.execute(query, {"mname": membername, "mclub": clubno, "mrank": rankno, "memberno": memberno})
     await db.commit()
+    await invalidate_ref("distmembers", "allmembers")
     return JSONResponse(content={"message": "성공적으로 저장되었습니다.", "redirect_url": f"/manage_cmembers?clubno={clubno}"})
 
 
@@ -1413,22 +2269,19 @@ async def api_get_clubmembers(clubno: int, db: AsyncSession = Depends(get_db)):
             "rankTitlekor": m[3] if m[3] else "-",
             "clubNo": m[4]
         })
-    return JSONResponse(content=result)
+    return FastJSONResponse(content=result)
 
 
 @app.post("/api/save_memo")
 async def save_memo(request: MemoRequest):
     try:
-        header, encoded = request.image.split(",", 1)
-        image_data = base64.b64decode(encoded)
-        save_dir = "static/img/memo"
-        os.makedirs(save_dir, exist_ok=True)
-        file_path = os.path.join(save_dir, f"{request.reservNo}.png")
-        with open(file_path, "wb") as f:
-            f.write(image_data)
+        file_path = Path("static/img/memo") / f"{request.reservNo}.png"
+        await asyncio.to_thread(write_data_url, request.image, file_path, MEMO_MAX_BYTES)
 
         return {"status": "success", "message": "Memo saved successfully"}
 
+    except HTTPException as e:
+        return {"status": "error", "message": e.detail}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -1449,181 +2302,120 @@ async def manage_gstbook(request: Request, db: AsyncSession = Depends(get_db)):
 
 @app.get("/api/ephoto/events")
 async def get_ephoto_events(db: AsyncSession = Depends(get_db)):
-    photo_dir = Path("static/img/event_photos")
-    if not photo_dir.exists():
-        return JSONResponse([])
-    event_nos = set()
-    for file in photo_dir.iterdir():
-        if file.is_file() and "-" in file.name:
-            try:
-                event_no = int(file.name.split("-")[0])
-                event_nos.add(event_no)
-            except ValueError:
-                continue
-
-    if not event_nos:
-        return JSONResponse([])
-    query = text("""
-                 SELECT a.reservNo, a.reservFrom, b.circleName, c.clubName
-                 FROM voteReserv a
-                          LEFT JOIN lionsCircle b ON a.circleNo = b.circleNo
-                          LEFT JOIN lionsClub c ON a.clubNo = c.clubNo
-                 WHERE a.reservNo IN :event_nos
-                 ORDER BY a.reservFrom DESC
-                 """)
-    result = await db.execute(query, {"event_nos": tuple(event_nos)})
-    rows = result.fetchall()
-
-    events = []
-    for row in rows:
-        dt = row[1]
-        dt_str = dt.strftime("%Y-%m-%d %H:%M") if hasattr(dt, "strftime") else str(dt)
-        name = row[2] or row[3] or "알 수 없음"
-        events.append({
-            "reservNo": row[0],
-            "label": f"[{dt_str}] {name} (예약번호: {row[0]})"
-        })
-
-    return JSONResponse(events)
+    return FastJSONResponse(await get_photo_events("EPHTO", db))
 
 
 @app.get("/api/gstbook/events")
 async def get_gstbook_events(db: AsyncSession = Depends(get_db)):
-    gstbook_dir = Path("static/img/gstbook")
-    if not gstbook_dir.exists():
-        return JSONResponse([])
-    event_nos = set()
-    for file in gstbook_dir.iterdir():
-        if file.is_file() and "-" in file.name:
-            try:
-                event_no = int(file.name.split("-")[2])
-                event_nos.add(event_no)
-            except ValueError:
-                continue
-
-    if not event_nos:
-        return JSONResponse([])
-
-    query = text("""
-                 SELECT a.reservNo, a.reservFrom, b.circleName, c.clubName
-                 FROM voteReserv a
-                          LEFT JOIN lionsCircle b ON a.circleNo = b.circleNo
-                          LEFT JOIN lionsClub c ON a.clubNo = c.clubNo
-                 WHERE a.reservNo IN :event_nos
-                 ORDER BY a.reservFrom DESC
-                 """)
-    result = await db.execute(query, {"event_nos": tuple(event_nos)})
-    rows = result.fetchall()
-
-    events = []
-    for row in rows:
-        dt = row[1]
-        dt_str = dt.strftime("%Y-%m-%d %H:%M") if hasattr(dt, "strftime") else str(dt)
-        name = row[2] or row[3] or "알 수 없음"
-        events.append({
-            "reservNo": row[0],
-            "label": f"[{dt_str}] {name} (예약번호: {row[0]})"
-        })
-
-    return JSONResponse(events)
+    return FastJSONResponse(await get_photo_events("GSTBK", db))
 
 
 @app.get("/api/ephoto/photos/{reserv_no}")
-async def get_ephoto_photos(reserv_no: int):
-    photo_dir = Path("static/img/event_photos")
-    if not photo_dir.exists():
-        return JSONResponse([])
-
-    photos = []
-    for file in photo_dir.glob(f"{reserv_no}-*.*"):
-        if file.suffix.lower() in [".jpg", ".jpeg", ".png", ".webp"]:
-            photos.append({
-                "filename": file.name,
-                "url": f"/static/img/event_photos/{file.name}"
-            })
-    photos.sort(key=lambda x: x["filename"])
-    return JSONResponse(photos)
+async def get_ephoto_photos(reserv_no: int, db: AsyncSession = Depends(get_db)):
+    return FastJSONResponse(await get_photo_list("EPHTO", reserv_no, ephoto_index.url_prefix, db))
 
 
 @app.get("/api/gstbook/photos/{reserv_no}")
-async def get_gstbook_photos(reserv_no: int):
-    gstbook_dir = Path("static/img/gstbook")
-    if not gstbook_dir.exists():
-        return JSONResponse([])
-
-    photos = []
-    for file in gstbook_dir.glob(f"gstb-*-{reserv_no}-*.*"):
-        if file.suffix.lower() in [".jpg", ".jpeg", ".png", ".webp"]:
-            photos.append({
-                "filename": file.name,
-                "url": f"/static/img/gstbook/{file.name}"
-            })
-
-    photos.sort(key=lambda x: x["filename"])
-    return JSONResponse(photos)
+async def get_gstbook_photos(reserv_no: int, db: AsyncSession = Depends(get_db)):
+    return FastJSONResponse(await get_photo_list("GSTBK", reserv_no, gstbook_index.url_prefix, db))
 
 
 
 @app.delete("/api/ephoto/photos/{filename}")
-async def delete_ephoto(filename: str):
+async def delete_ephoto(filename: str, db: AsyncSession = Depends(get_db)):
     file_path = Path("static/img/event_photos") / filename
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="File not found")
     try:
+        ephoto_index.refresh()
         file_path.unlink()
+        remove_variants(file_path)
+        ephoto_index.remove(filename)
+        await uncatalog_photo("EPHTO", filename, db)
         return JSONResponse({"success": True})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.delete("/api/gstbook/photos/{filename}")
-async def delete_gstbook(filename: str):
+async def delete_gstbook(filename: str, db: AsyncSession = Depends(get_db)):
     file_path = Path("static/img/gstbook") / filename
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="File not found")
     try:
+        gstbook_index.refresh()
         file_path.unlink()  # 파일 삭제
+        remove_variants(file_path)
+        gstbook_index.remove(filename)
+        page_cache.invalidate(*gstbook_page_tags(filename))
+        await uncatalog_photo("GSTBK", filename, db)
         return JSONResponse({"success": True})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/ephoto/photos/{filename}/rotate")
-async def rotate_ephoto(filename: str):
+async def rotate_ephoto(filename: str, db: AsyncSession = Depends(get_db)):
     file_path = Path("static/img/event_photos") / filename
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="File not found")
     try:
-        with Image.open(file_path) as img:
-            rotated = img.transpose(Image.ROTATE_270)
-            rotated.save(file_path)
-
-        import time
+        variants = await image_pool.run(rotate_photo_file, file_path, "/static/img/event_photos")
+        await update_photo_meta("EPHTO", filename, file_path, db, variants)
         return JSONResponse({
             "success": True,
-            "url": f"/static/img/event_photos/{filename}?t={int(time.time())}"
+            "url": f"/static/img/event_photos/{filename}?t={int(time.time())}",
+            "thumb": photo_url(f"/static/img/event_photos/{filename}", 320)
         })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/gstbook/photos/{filename}/rotate")
-async def rotate_guestbook(filename: str):
+async def rotate_guestbook(filename: str, db: AsyncSession = Depends(get_db)):
     file_path = Path("static/img/gstbook") / filename
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="File not found")
     try:
-        with Image.open(file_path) as img:
-            rotated = img.transpose(Image.ROTATE_270)
-            rotated.save(file_path)
-
-        import time
+        variants = await image_pool.run(rotate_photo_file, file_path, "/static/img/gstbook")
+        await update_photo_meta("GSTBK", filename, file_path, db, variants)
+        page_cache.invalidate(*gstbook_page_tags(filename))
         return JSONResponse({
             "success": True,
-            "url": f"/static/img/gstbook/{filename}?t={int(time.time())}"
+            "url": f"/static/img/gstbook/{filename}?t={int(time.time())}",
+            "thumb": photo_url(f"/static/img/gstbook/{filename}", 320)
         })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/photo/{kind}/{filename}")
+async def get_photo(request: Request, kind: str, filename: str, w: int = 800, v: str = ""):
+    if kind not in PHOTO_KINDS or Path(filename).name != filename or filename.startswith("."):
+        raise HTTPException(status_code=404, detail="File not found")
+    src_path = PHOTO_KINDS[kind][0] / filename
+    try:
+        src_stat = src_path.stat()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    if not stat.S_ISREG(src_stat.st_mode):
+        raise HTTPException(status_code=404, detail="File not found")
+    path, st, media_type = pick_variant(src_path, src_stat, w, request.headers.get("accept", ""))
+    # 버전(v)이 현재 원본과 같으면 내용이 바뀌지 않으므로 오래 캐시한다.
+    # 버전이 없거나 옛 버전이면 매번 ETag 로 다시 확인하게 한다.
+    if v and v == photo_version(src_stat):
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        cache_control = "no-cache"
+    response = FileResponse(path, media_type=media_type, stat_result=st,
+                            headers={"Cache-Control": cache_control, "Vary": "Accept"})
+    if etag_matches(request.headers.get("if-none-match", ""), response.headers["etag"]):
+        return Response(status_code=304, headers={k: response.headers[k] for k in ("etag", "cache-control", "vary")})
+    return response
+
+
 @app.get("/upload_ephoto", response_class=HTMLResponse)
 async def upload_ephoto_page(request: Request, db: AsyncSession = Depends(get_db)):
     if not request.session.get("vote_user_No"):
@@ -1648,50 +2440,33 @@ async def api_get_distmembers(db: AsyncSession = Depends(get_db)):
             "position": m[4] if m[4] else "",
             "club_name": m[5]
         })
-    return JSONResponse(content=result)
+    return FastJSONResponse(content=result)
 
 @app.get("/select_gstbook", response_class=HTMLResponse)
 async def select_gstbook(request: Request):
-    gstbook_dir = Path("static/img/gstbook")
-    dates = set()
-
-    if gstbook_dir.exists():
-        for file in gstbook_dir.iterdir():
-            # 파일명이 gstb- 로 시작하는 파일만 처리
-            if file.is_file() and file.name.startswith("gstb-"):
-                parts = file.name.split("-")
-                if len(parts) >= 2:
-                    date_str = parts[1]  # {gdate} 추출
-                    dates.add(date_str)
+    cached = page_cache.lookup(request)
+    if cached is not None:
+        return cached
+    sorted_dates = gstbook_index.dates()
 
-    sorted_dates = sorted(list(dates), reverse=True)
-
-    return templates.TemplateResponse(
+    return page_cache.store(request, templates.TemplateResponse(
         "history/gstbook_date_select.html",
         {"request": request, "dates": sorted_dates}
-    )
+    ), "gstbook")
 
 
 @app.get("/tileview_gstbook/{gdate}", response_class=HTMLResponse)
 async def tileview_gstbook(request: Request, gdate: str):
-    gstbook_dir = Path("static/img/gstbook")
-    images = []
-
-    if gstbook_dir.exists():
-        valid_exts = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
-        for file in gstbook_dir.iterdir():
-            if file.is_file() and file.name.startswith(f"gstb-{gdate}-") and file.name.lower().endswith(valid_exts):
-                images.append(f"/static/img/gstbook/{file.name}")
-
-    def natural_sort_key(s):
-        return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', s)]
+    cached = page_cache.lookup(request)
+    if cached is not None:
+        return cached
+    valid_exts = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+    images = [gstbook_index.url(f) for f in gstbook_index.date_files(gdate) if f.lower().endswith(valid_exts)]
 
-    images.sort(key=natural_sort_key)
-
-    return templates.TemplateResponse(
+    return page_cache.store(request, templates.TemplateResponse(
         "history/gstbook_tileview.html",
         {"request": request, "date": gdate, "images": images}
-    )
+    ), f"gstbook:{gdate}")
 
 
 # 1. 프론트엔드 페이지를 렌더링하는 라우터
@@ -1712,12 +2487,11 @@ async def upload_member_photo_batch(photo: UploadFile = File(...)):
     filename = photo.filename
     save_path = Path(MEMBERPHOTO_DIR) / filename
 
-    # 디렉토리가 없으면 생성
-    os.makedirs(MEMBERPHOTO_DIR, exist_ok=True)
-
     try:
-        with save_path.open("wb") as buffer:
-            shutil.copyfileobj(photo.file, buffer)
+        await save_upload(photo, save_path, MEMBERPHOTO_MAX_BYTES)
+        await image_pool.run(make_variants, save_path, "/static/img/members")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save file: {e}")
 
@@ -1725,11 +2499,6 @@ async def upload_member_photo_batch(photo: UploadFile = File(...)):
     return {"filename": filename, "url": url_path}
 
 
-if __name__ == "__main__":
-    import uvicorn
-
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-    )
+# 실행: uvicorn main:app --host 0.0.0.0 --port 8000
+# python main.py 로 띄우지 않는다. ImagePool 의 spawn 워커가 실행한 스크립트를 __mp_main__ 으로 다시 import 해서
+# 워커마다 앱 전체(DB 엔진, SSE hub, 캐시)를 다시 만들게 된다. uvicorn 으로 띄우면 워커는 imageTools 만 import 한다.
@@ -0,0 +1,5 @@
+-- /api/get_reserv?since=<version> 변경분 조회용 인덱스
+CREATE INDEX idx_voteReserv_modDate ON voteReserv (modDate);
+
+-- 기존 행에도 버전이 잡히도록 modDate 가 비어 있으면 채워 둔다
+UPDATE voteReserv SET modDate = now() WHERE modDate IS NULL;
@@ -0,0 +1,2 @@
+-- /viewer/schedule_today, /viewer/schedule_week 의 날짜 구간 조회용 인덱스
+CREATE INDEX idx_voteReserv_attrib_reservFrom ON voteReserv (attrib, reservFrom);
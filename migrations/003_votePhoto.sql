@@ -0,0 +1,20 @@
+-- 행사사진/방명록 사진 카탈로그 (파일명 규칙 대신 조회용)
+CREATE TABLE votePhoto (
+    photoNo     INT AUTO_INCREMENT PRIMARY KEY,
+    photoKind   VARCHAR(5)   NOT NULL,              -- EPHTO: 행사사진, GSTBK: 방명록
+    reservNo    INT          NOT NULL,
+    gdate       VARCHAR(8)   NULL,                  -- 방명록 날짜(YYYYMMDD)
+    fileName    VARCHAR(255) NOT NULL,
+    fileSize    INT          NOT NULL,
+    width       INT          NULL,
+    height      INT          NULL,
+    contentHash CHAR(64)     NOT NULL,              -- sha256
+    variants    VARCHAR(2000) NULL,                 -- 파생 이미지 경로 JSON
+    attrib      VARCHAR(10)  NOT NULL DEFAULT '1000010000',
+    regDate     DATETIME     NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    modDate     DATETIME     NULL,
+    KEY idx_votePhoto_kind_reserv (photoKind, reservNo, attrib),
+    KEY idx_votePhoto_kind_gdate (photoKind, gdate),
+    KEY idx_votePhoto_fileName (fileName),
+    KEY idx_votePhoto_hash (contentHash)
+);
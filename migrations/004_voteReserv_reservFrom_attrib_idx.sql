@@ -0,0 +1,10 @@
+-- 002 의 (attrib, reservFrom) 인덱스는 attrib not like '%XXX%' (앞 와일드카드) 조건으로는 첫 컬럼을
+-- 탐색할 수 없어서 reservFrom 구간 조회에 쓰이지 않는다. reservFrom 을 앞에 둔다:
+-- 구간은 range 로 읽고, attrib 조건은 인덱스 안에서 거르고(ICP), order by reservFrom 은 정렬 없이 끝난다.
+--
+-- 확인: EXPLAIN SELECT reservNo FROM voteReserv
+--       WHERE attrib NOT LIKE '%XXX%' AND reservFrom >= '2026-03-10' AND reservFrom < '2026-03-11'
+--       ORDER BY reservFrom;
+--   -> key = idx_voteReserv_reservFrom_attrib, type = range, Extra 에 filesort 가 없어야 한다.
+DROP INDEX idx_voteReserv_attrib_reservFrom ON voteReserv;
+CREATE INDEX idx_voteReserv_reservFrom_attrib ON voteReserv (reservFrom, attrib);
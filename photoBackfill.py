@@ -0,0 +1,124 @@
+import os
+import sys
+import asyncio
+import argparse
+import json
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from photoIndex import PHOTO_DIR, GSTB_DIR, parse_ephoto_name, parse_gstbook_name
+from imageTools import make_variants, variant_path, read_photo_meta, VARIANT_WIDTHS
+
+# .env 의 dburl 로 DB 에 접속한다 (main 은 import 하지 않는다).
+dotenv.load_dotenv()
+
+SOURCES = (
+    ("EPHTO", PHOTO_DIR, parse_ephoto_name, "/static/img/event_photos"),
+    ("GSTBK", GSTB_DIR, parse_gstbook_name, "/static/img/gstbook"),
+)
+
+
+async def run_in_pool(pool, fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+
+async def catalog_photo(pool, db, kind, path, reservno, gdate):
+    # main.catalog_photo 와 같은 행을 넣는다 (파생 이미지는 --variants 에서 따로 만든다)
+    meta = await run_in_pool(pool, read_photo_meta, path)
+    await db.execute(
+        text("""insert into votePhoto (photoKind, fileName, reservNo, gdate, fileSize, width, height, contentHash,
+                                       attrib, regDate)
+                values (:kind, :fname, :reservno, :gdate, :fileSize, :width, :height, :contentHash, :attrib, :now)"""),
+        {"kind": kind, "fname": path.name, "reservno": reservno, "gdate": gdate, "attrib": "1000010000",
+         "now": datetime.now(), **meta},
+    )
+    await db.commit()
+
+
+async def build_variants(pool, db, kind, directory, url_prefix, dry_run):
+    # 파생 이미지(가장 작은 폭 webp)가 없는 카탈로그 사진만 새로 만든다.
+    result = await db.execute(
+        text("select fileName from votePhoto where photoKind = :kind and attrib not like :attpatt"),
+        {"kind": kind, "attpatt": "%XXX%"},
+    )
+    made = 0
+    for (fname,) in result.fetchall():
+        path = directory / fname
+        if not path.is_file() or variant_path(path, VARIANT_WIDTHS[0], "webp").exists():
+            continue
+        print(f"[VARIANT] {kind} {fname}")
+        if not dry_run:
+            try:
+                variants = await run_in_pool(pool, make_variants, path, url_prefix)
+            except Exception as e:
+                print(f"[FAIL] {fname}: {e}")
+                continue
+            await db.execute(
+                text("update votePhoto set variants = :variants where photoKind = :kind and fileName = :fname"),
+                {"variants": json.dumps(variants), "kind": kind, "fname": fname},
+            )
+            await db.commit()
+        made += 1
+    return made
+
+
+async def backfill(dry_run=False, variants=False, jobs=2):
+    engine = create_async_engine(os.getenv("dburl"), pool_pre_ping=True)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    with ProcessPoolExecutor(jobs) as pool:
+        async with async_session() as db:
+            added, skipped, made = await backfill_sources(pool, db, dry_run, variants)
+    await engine.dispose()
+    print("\n===== 완료 =====")
+    print(f"등록: {added}")
+    print(f"스킵: {skipped}")
+    if variants:
+        print(f"파생 이미지: {made}")
+    return 0
+
+
+async def backfill_sources(pool, db, dry_run, variants):
+    added = 0
+    skipped = 0
+    made = 0
+    for kind, directory, parse, url_prefix in SOURCES:
+        if not directory.exists():
+            continue
+        result = await db.execute(
+            text("select fileName from votePhoto where photoKind = :kind and attrib not like :attpatt"),
+            {"kind": kind, "attpatt": "%XXX%"},
+        )
+        known = {row[0] for row in result.fetchall()}
+        for path in sorted(directory.iterdir()):
+            key = parse(path.name) if path.is_file() else None
+            if key is None or path.name in known:
+                skipped += 1
+                continue
+            print(f"[ADD] {kind} {path.name}")
+            if not dry_run:
+                await catalog_photo(pool, db, kind, path, key[0], key[1])
+            added += 1
+        if variants:
+            made += await build_variants(pool, db, kind, directory, url_prefix, dry_run)
+    return added, skipped, made
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="기존 행사사진/방명록 파일을 votePhoto 카탈로그에 등록합니다.")
+    parser.add_argument("--dry-run", action="store_true", help="등록할 파일만 출력")
+    parser.add_argument("--variants", action="store_true", help="파생 이미지(썸네일/WebP)가 없는 사진에 새로 생성")
+    parser.add_argument("--jobs", type=int, default=2, help="이미지 처리 프로세스 수")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sys.exit(asyncio.run(backfill(dry_run=args.dry_run, variants=args.variants, jobs=args.jobs)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import os
+import sys
+import hashlib
+import argparse
+from pathlib import Path
+from collections import defaultdict
+
+# 회원 사진(static/img/members)은 넣지 않는다. 회원마다 따로 바뀌는 파일이라 하드링크로 묶으면 안 된다.
+DEFAULT_DIRS = ["./static/img/event_photos", "./static/img/gstbook"]
+
+
+def file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def scan(dirs):
+    # 크기가 같은 파일끼리만 해시를 계산한다. 숨김 파일(.part 등)은 건너뛴다.
+    by_size = defaultdict(list)
+    for d in dirs:
+        root = Path(d)
+        if not root.exists():
+            print(f"[SKIP] 폴더 없음: {root}")
+            continue
+        for path in sorted(root.rglob("*")):
+            if path.is_file() and not path.name.startswith("."):
+                by_size[path.stat().st_size].append(path)
+    groups = defaultdict(list)
+    for size, paths in by_size.items():
+        if len(paths) < 2:
+            continue
+        for path in paths:
+            groups[(size, file_hash(path))].append(path)
+    return [paths for paths in groups.values() if len(paths) > 1]
+
+
+def relink(keep: Path, path: Path):
+    # 임시 이름으로 하드링크를 만든 뒤 rename 해서 중간에 파일이 비는 순간이 없게 한다.
+    tmp = path.with_name(f".{path.name}.dedupe.part")
+    os.link(keep, tmp)
+    os.replace(tmp, path)
+
+
+def dedupe(dirs, dry_run=False):
+    linked = 0
+    saved = 0
+    failed = 0
+    for paths in scan(dirs):
+        # 가장 먼저 올라온(수정 시각이 가장 이른) 파일을 원본으로 둔다
+        paths.sort(key=lambda p: p.stat().st_mtime)
+        keep = paths[0]
+        keep_stat = keep.stat()
+        for path in paths[1:]:
+            st = path.stat()
+            if (st.st_dev, st.st_ino) == (keep_stat.st_dev, keep_stat.st_ino):
+                continue
+            print(f"[LINK] {path} -> {keep}")
+            if not dry_run:
+                try:
+                    relink(keep, path)
+                except OSError as e:
+                    print(f"[FAIL] {path}: {e}")
+                    failed += 1
+                    continue
+            linked += 1
+            saved += st.st_size
+    print("\n===== 완료 =====")
+    print(f"링크: {linked}")
+    print(f"실패: {failed}")
+    print(f"절약: {saved / 1024 / 1024:.1f} MB")
+    return 0 if failed == 0 else 1
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="사진 폴더의 내용이 같은 파일을 하드링크 하나로 합칩니다. 파일명은 그대로 유지됩니다.")
+    parser.add_argument("dirs", nargs="*", default=DEFAULT_DIRS, help="대상 폴더 (하위 variants 폴더 포함)")
+    parser.add_argument("--dry-run", action="store_true", help="합칠 파일만 출력")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sys.exit(dedupe(args.dirs, dry_run=args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
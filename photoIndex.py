@@ -0,0 +1,132 @@
+import os
+import re
+from pathlib import Path
+from collections import defaultdict
+
+from histTools import natural_sort_key
+
+# 행사사진/방명록 폴더와 파일명 규칙, 폴더 색인 (main.py, photoBackfill.py, uploadConcurrency.py 공용).
+# 스크립트가 main 을 import 하지 않도록 앱/DB/.env 에 의존하는 것은 여기 두지 않는다.
+PHOTO_DIR = Path("./static/img/event_photos")
+GSTB_DIR = Path("./static/img/gstbook")
+
+EPHOTO_NAME_IDX = re.compile(r"^\d+-(-?\d+)\.[^.]+$")
+GSTBOOK_NAME_IDX = re.compile(r"^gstb-[^-]+-\d+-(-?\d+)\.[^.]+$")
+
+
+def parse_ephoto_name(name: str):
+    # {eventNo}-{idx}.{ext} -> (eventNo, None, idx)
+    try:
+        event_no = int(name.split("-")[0])
+    except ValueError:
+        return None
+    m = EPHOTO_NAME_IDX.match(name)
+    return event_no, None, int(m.group(1)) if m else None
+
+
+def parse_gstbook_name(name: str):
+    # gstb-{gdate}-{eventNo}-{idx}.{ext} -> (eventNo, gdate, idx)
+    parts = name.split("-")
+    if parts[0] != "gstb" or len(parts) < 3:
+        return None
+    try:
+        event_no = int(parts[2])
+    except ValueError:
+        return None
+    m = GSTBOOK_NAME_IDX.match(name)
+    return event_no, parts[1], int(m.group(1)) if m else None
+
+
+class PhotoIndex:
+    # 사진 폴더의 메모리 색인 (예약번호별, 방명록 날짜별).
+    # 업로드/삭제 라우트가 add/remove 로 갱신하고, 폴더 mtime 이 바뀌면(외부 변경) 다시 읽는다.
+    # mtime_ns 는 실제로 다시 읽은 rebuild() 에서만 갱신한다. add/remove 에서 갱신하면 그 사이
+    # 다른 워커가 쓴 파일이 이 워커의 색인에서 영영 빠진다. 자기 쓰기 뒤에는 한 번 더 읽게 된다.
+    def __init__(self, directory: Path, url_prefix: str, parse):
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self.parse = parse
+        self.files: dict[str, tuple] = {}
+        self.by_event: dict[int, set[str]] = defaultdict(set)
+        self.by_date: dict[str, set[str]] = defaultdict(set)
+        self.last_idx: dict[tuple, int] = {}  # (eventNo, gdate) -> 마지막 번호. 삭제돼도 줄이지 않는다.
+        self.mtime_ns = None
+    def _dir_mtime(self):
+        try:
+            return self.directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+    def rebuild(self):
+        self.files.clear()
+        self.by_event.clear()
+        self.by_date.clear()
+        # last_idx 는 비우지 않는다: 다시 읽어도 지워진 번호를 재사용하지 않도록
+        self.mtime_ns = self._dir_mtime()
+        if self.mtime_ns is None:
+            return
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.startswith("."):
+                    self._add(entry.name)
+    def refresh(self):
+        if self._dir_mtime() != self.mtime_ns:
+            self.rebuild()
+    def _add(self, name: str):
+        key = self.parse(name)
+        if key is None:
+            return
+        self.files[name] = key
+        self.by_event[key[0]].add(name)
+        if key[1] is not None:
+            self.by_date[key[1]].add(name)
+        if key[2] is not None and key[2] > self.last_idx.get(key[:2], 0):
+            self.last_idx[key[:2]] = key[2]
+    def add(self, name: str):
+        self._add(name)
+    def remove(self, name: str):
+        key = self.files.pop(name, None)
+        if key is not None:
+            self.by_event[key[0]].discard(name)
+            if not self.by_event[key[0]]:
+                del self.by_event[key[0]]
+            if key[1] is not None:
+                self.by_date[key[1]].discard(name)
+                if not self.by_date[key[1]]:
+                    del self.by_date[key[1]]
+    def allocate(self, event_no: int, gdate: str | None, make_name) -> tuple[str, Path, Path]:
+        # 다음 번호를 숨김 예약 파일(.{name}.reserved)을 O_EXCL 로 만들어 선점한다.
+        # 업로드는 예약 파일에 쓰고 os.replace 로 최종 이름에 놓는다. rename 은 원자적이라 예약 파일과
+        # 최종 파일 중 하나는 늘 있으므로, 예약을 잡은 뒤 최종 파일이 없으면 그 번호는 비어 있다.
+        # 숨김 파일이라 목록(색인, 방명록 타일)에는 빈 이미지로 보이지 않는다.
+        key = (event_no, gdate)
+        idx = self.last_idx.get(key, 0)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        while True:
+            idx += 1
+            name = make_name(idx)
+            path = self.directory / name
+            reserved = self.directory / f".{name}.reserved"
+            try:
+                fd = os.open(reserved, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                continue
+            os.close(fd)
+            if path.exists():
+                reserved.unlink(missing_ok=True)
+                continue
+            self.last_idx[key] = idx
+            return name, path, reserved
+    def event_nos(self) -> list[int]:
+        self.refresh()
+        return list(self.by_event)
+    def event_files(self, event_no: int) -> list[str]:
+        self.refresh()
+        return sorted(self.by_event.get(event_no, ()))
+    def dates(self) -> list[str]:
+        self.refresh()
+        return sorted(self.by_date, reverse=True)
+    def date_files(self, gdate: str) -> list[str]:
+        self.refresh()
+        return sorted(self.by_date.get(gdate, ()), key=natural_sort_key)
+    def url(self, name: str) -> str:
+        return f"{self.url_prefix}/{name}"
@@ -1,31 +1,92 @@
 import os
 import sys
+import json
+import hashlib
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image
 
 SUPPORTED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp", ".tif", ".tiff"}
+PNG_MODES = {"1", "L", "LA", "I", "I;16", "P", "RGB", "RGBA"}
+MANIFEST_NAME = ".pngConv_manifest.json"
 
 
-def make_unique_path(path):
-    if not os.path.exists(path):
+def make_unique_path(path, reserved=()):
+    if not os.path.exists(path) and path not in reserved:
         return path
 
     base, ext = os.path.splitext(path)
     index = 1
     while True:
         candidate = f"{base}_{index}{ext}"
-        if not os.path.exists(candidate):
+        if not os.path.exists(candidate) and candidate not in reserved:
             return candidate
         index += 1
 
 
-def convert_to_png(src_path, dst_path):
+def png_mode(img):
+    # PNG 가 그대로 담을 수 있는 모드는 유지한다 (JPEG 의 RGB 를 RGBA 로 바꾸면 용량만 커진다).
+    if img.mode in PNG_MODES:
+        return img.mode
+    if "A" in img.getbands() or "transparency" in img.info:
+        return "RGBA"
+    return "RGB"
+
+
+def convert_to_png(src_path, dst_path, optimize=False, compress_level=6):
     with Image.open(src_path) as img:
-        if img.mode in ("RGBA", "LA"):
-            converted = img.convert("RGBA")
-        else:
-            converted = img.convert("RGBA")
-        converted.save(dst_path, "PNG")
+        mode = png_mode(img)
+        converted = img if img.mode == mode else img.convert(mode)
+        converted.save(dst_path, "PNG", optimize=optimize, compress_level=compress_level)
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def convert_job(src_path, dst_path, optimize, compress_level):
+    # 워커 프로세스에서 실행. 매니페스트에 기록할 원본 정보도 함께 돌려준다.
+    try:
+        convert_to_png(src_path, dst_path, optimize=optimize, compress_level=compress_level)
+    except Exception as e:
+        return src_path, dst_path, None, str(e)
+    st = os.stat(src_path)
+    return src_path, dst_path, {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": file_hash(src_path), "dst": dst_path}, None
+
+
+def load_manifest(path):
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        print(f"[WARN] 매니페스트를 읽을 수 없어 전체 변환합니다: {path}")
+        return {}
+
+
+def save_manifest(path, manifest):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def unchanged(src_path, entry):
+    # mtime/크기가 같으면 바로 스킵, 다르면 해시를 비교한다 (touch 만 된 파일).
+    if not entry or not os.path.exists(entry["dst"]):
+        return False
+    st = os.stat(src_path)
+    if st.st_mtime_ns == entry["mtime_ns"] and st.st_size == entry["size"]:
+        return True
+    if st.st_size == entry["size"] and file_hash(src_path) == entry["sha256"]:
+        entry["mtime_ns"] = st.st_mtime_ns
+        return True
+    return False
 
 
 def collect_files(folder, recursive=False):
@@ -44,7 +105,8 @@ def collect_files(folder, recursive=False):
     return sorted(files)
 
 
-def process_folder(input_dir, output_dir=None, recursive=False, skip_existing=False):
+def process_folder(input_dir, output_dir=None, recursive=False, skip_existing=False,
+                   jobs=1, incremental=False, manifest_path=None, optimize=False, compress_level=6):
     if not os.path.isdir(input_dir):
         print(f"[ERROR] 입력 폴더가 존재하지 않습니다: {input_dir}")
         return 1
@@ -52,6 +114,10 @@ def process_folder(input_dir, output_dir=None, recursive=False, skip_existing=Fa
     if output_dir:
         os.makedirs(output_dir, exist_ok=True)
 
+    if incremental and not manifest_path:
+        manifest_path = os.path.join(output_dir or input_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path) if incremental else {}
+
     all_files = collect_files(input_dir, recursive=recursive)
 
     total = 0
@@ -59,6 +125,9 @@ def process_folder(input_dir, output_dir=None, recursive=False, skip_existing=Fa
     skipped = 0
     errors = 0
 
+    # 대상 파일명은 여기서(단일 프로세스) 정해서 병렬 변환 중에 이름이 겹치지 않게 한다.
+    tasks = []
+    reserved = set()
     for src_path in all_files:
         ext = os.path.splitext(src_path)[1].lower()
 
@@ -76,21 +145,44 @@ def process_folder(input_dir, output_dir=None, recursive=False, skip_existing=Fa
             skipped += 1
             continue
 
-        if os.path.exists(dst_path):
+        key = os.path.abspath(src_path)
+        if incremental and key in manifest:
+            if unchanged(src_path, manifest[key]):
+                print(f"[SKIP] 변경 없음: {src_path}")
+                skipped += 1
+                continue
+            # 지난 실행에서 만든 파일은 새 이름을 만들지 않고 덮어쓴다
+            dst_path = manifest[key]["dst"]
+        elif os.path.exists(dst_path) or dst_path in reserved:
             if skip_existing:
                 print(f"[SKIP] 대상 파일이 이미 존재합니다: {dst_path}")
                 skipped += 1
                 continue
             else:
-                dst_path = make_unique_path(dst_path)
+                dst_path = make_unique_path(dst_path, reserved)
+
+        reserved.add(dst_path)
+        tasks.append((src_path, dst_path))
 
-        try:
-            convert_to_png(src_path, dst_path)
-            converted += 1
-            print(f"[OK] {src_path} -> {dst_path}")
-        except Exception as e:
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(jobs) as pool:
+            results = pool.map(convert_job, *zip(*tasks), [optimize] * len(tasks), [compress_level] * len(tasks),
+                               chunksize=max(1, len(tasks) // (jobs * 8)))
+            results = list(results)
+    else:
+        results = [convert_job(src, dst, optimize, compress_level) for src, dst in tasks]
+
+    for src_path, dst_path, entry, error in results:
+        if error is not None:
             errors += 1
-            print(f"[ERROR] {src_path}: {e}")
+            print(f"[ERROR] {src_path}: {error}")
+            continue
+        converted += 1
+        manifest[os.path.abspath(src_path)] = entry
+        print(f"[OK] {src_path} -> {dst_path}")
+
+    if incremental:
+        save_manifest(manifest_path, manifest)
 
     print("\n===== 완료 =====")
     print(f"입력 폴더: {input_dir}")
@@ -99,6 +191,8 @@ def process_folder(input_dir, output_dir=None, recursive=False, skip_existing=Fa
     print(f"변환 성공: {converted}")
     print(f"스킵: {skipped}")
     print(f"에러: {errors}")
+    if incremental:
+        print(f"매니페스트: {manifest_path}")
 
     return 0 if errors == 0 else 2
 
@@ -109,6 +203,11 @@ def parse_args():
     parser.add_argument("--output", help="출력 폴더 경로 (미지정 시 입력 폴더에 저장)")
     parser.add_argument("--recursive", action="store_true", help="하위 폴더까지 재귀적으로 처리")
     parser.add_argument("--skip-existing", action="store_true", help="이미 같은 이름의 PNG가 있으면 건너뜀")
+    parser.add_argument("--jobs", type=int, default=1, help="동시 변환 프로세스 수 (0: CPU 코어 수)")
+    parser.add_argument("--incremental", action="store_true", help="지난 실행 매니페스트와 mtime/해시가 같은 원본은 건너뜀")
+    parser.add_argument("--manifest", help=f"매니페스트 경로 (기본: 출력 폴더의 {MANIFEST_NAME})")
+    parser.add_argument("--optimize", action="store_true", help="PNG optimize (느리지만 더 작게)")
+    parser.add_argument("--compress-level", type=int, default=6, choices=range(10), metavar="0-9", help="zlib 압축 레벨 (기본 6)")
     return parser.parse_args()
 
 
@@ -119,10 +218,14 @@ def main():
         output_dir=args.output,
         recursive=args.recursive,
         skip_existing=args.skip_existing,
+        jobs=args.jobs or os.cpu_count() or 1,
+        incremental=args.incremental,
+        manifest_path=args.manifest,
+        optimize=args.optimize,
+        compress_level=args.compress_level,
     )
     sys.exit(exit_code)
 
 
 if __name__ == "__main__":
     main()
-
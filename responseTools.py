@@ -0,0 +1,116 @@
+import json
+import gzip
+from decimal import Decimal
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+
+# JSON 직렬화와 응답 압축 (main.py, benchJson.py 공용). benchJson.py 가 main 을 import 하지 않도록
+# 앱/DB/.env 에 의존하는 것은 여기 두지 않는다.
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def json_default(obj):
+    # orjson 이 직접 못 다루는 타입. datetime/date 는 orjson 이 ISO 문자열로 바로 쓴다.
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    return jsonable_encoder(obj)
+
+
+class FastJSONResponse(JSONResponse):
+    # orjson 이 있으면 orjson 으로, 없으면 표준 json 으로 직렬화한다 (출력 형식은 같다).
+    # 라우트에서 직접 돌려주면 FastAPI 의 jsonable_encoder 단계도 건너뛴다.
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def accepted_encodings(header: str) -> set[str]:
+    # "br;q=1.0, gzip, *;q=0" -> {"br", "gzip"} (q=0 은 거부)
+    accepted = set()
+    for item in header.lower().split(","):
+        name, _, params = item.partition(";")
+        q = params.strip().removeprefix("q=")
+        try:
+            if q and float(q) == 0:
+                continue
+        except ValueError:
+            pass
+        accepted.add(name.strip())
+    return accepted
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match 는 약한 비교: W/ 유무는 무시한다 (압축하면 CompressionMiddleware 가 W/ 를 붙인다)
+    if if_none_match.strip() == "*":
+        return True
+    tag = etag.removeprefix("W/")
+    return tag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+
+
+# 응답 압축 (CompressionMiddleware). 최소 크기는 main 이 compressMinBytes 설정으로 넘긴다.
+COMPRESS_TYPES = {"application/json", "text/html", "text/plain", "text/css", "text/javascript",
+                  "application/javascript", "image/svg+xml"}
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4  # 동적 응답용. 11 은 정적 파일 빌드(staticBuild.py)에서만 쓴다.
+
+
+def pick_encoding(accept_encoding: str) -> str | None:
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    # 본문이 메시지 하나로 끝나는 응답(JSON, 렌더링된 HTML)만 br/gzip 으로 압축한다.
+    # 스트리밍 응답(SSE, 파일)과 이미 Content-Encoding 이 있는 응답(정적 .br/.gz)은 그대로 보낸다.
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = pick_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start = None
+        async def compressing_send(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None:
+                return await send(message)
+            head, start = start, None
+            headers = MutableHeaders(scope=head)
+            body = message.get("body", b"")
+            media_type = headers.get("content-type", "").split(";")[0].strip()
+            if media_type in COMPRESS_TYPES and "content-encoding" not in headers:
+                headers.add_vary_header("Accept-Encoding")
+                if encoding and not message.get("more_body") and len(body) >= self.minimum_size:
+                    body = compress_body(body, encoding)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    etag = headers.get("etag")
+                    if etag and not etag.startswith("W/"):
+                        headers["ETag"] = f"W/{etag}"
+                    message = {**message, "body": body}
+            await send(head)
+            await send(message)
+        await self.app(scope, receive, compressing_send)
@@ -0,0 +1,185 @@
+import json
+import time
+import asyncio
+from datetime import datetime
+from collections import deque
+from fastapi.encoders import jsonable_encoder
+
+# /sse/schedule 의 SSE hub 와 브로커. benchSse.py 가 main 을 import 하지 않도록
+# 앱/DB/.env 에 의존하는 것은 여기 두지 않는다 (브로커 주소는 main 이 넘긴다).
+
+
+class MemorySseBroker:
+    # 단일 프로세스용: 발행하면 바로 같은 워커의 hub 로 전달
+    def __init__(self):
+        self.deliver = None
+        self.last_id = 0
+    async def start(self, deliver):
+        self.deliver = deliver
+    async def stop(self):
+        pass
+    async def next_id(self) -> int:
+        self.last_id += 1
+        return self.last_id
+    async def publish(self, msg: dict):
+        await self.deliver(msg)
+
+
+class RedisSseBroker:
+    # 멀티 워커용: Redis(호환) pub/sub 채널로 모든 워커에 전달, 이벤트 번호는 INCR 로 전역 발급
+    def __init__(self, url: str, channel: str = "lions_vote:sse"):
+        self.url = url
+        self.channel = channel
+        self.client = None
+        self.pubsub = None
+        self.task = None
+        self.deliver = None
+    async def start(self, deliver):
+        import redis.asyncio as aioredis
+        self.deliver = deliver
+        self.client = aioredis.from_url(self.url)
+        self.pubsub = self.client.pubsub()
+        await self.pubsub.subscribe(self.channel)
+        self.task = asyncio.create_task(self._listen())
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+        if self.pubsub:
+            await self.pubsub.unsubscribe(self.channel)
+            await self.pubsub.close()
+        if self.client:
+            await self.client.close()
+    async def next_id(self) -> int:
+        return int(await self.client.incr(f"{self.channel}:id"))
+    async def publish(self, msg: dict):
+        await self.client.publish(self.channel, json.dumps(jsonable_encoder(msg), ensure_ascii=False))
+    async def _listen(self):
+        while True:
+            try:
+                async for m in self.pubsub.listen():
+                    if m.get("type") != "message":
+                        continue
+                    await self.deliver(json.loads(m["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"SSE broker error: {e}")
+                await asyncio.sleep(1.0)
+
+
+SSE_PING = {"id": None, "event": "ping", "data": {}}
+
+
+class SseSubscriber:
+    # /sse/schedule 연결 하나. 큐 크기를 제한하고 지연 상태를 기록한다.
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.connected_at = datetime.now()
+        self.sent_id = 0
+        self.resyncs = 0
+        self.recent_resyncs: deque = deque()  # 최근 resync_window 초 안의 재동기화 시각
+        self.closed = False
+
+
+class SseHub:
+    def __init__(self, broker=None, history: int = 1000, queue_size: int = 64, max_resyncs: int = 5,
+                 resync_window: float = 60.0, heartbeat_sec: float = 15.0):
+        self.broker = broker or MemorySseBroker()
+        self.subscribers: set[SseSubscriber] = set()
+        self.last_id = 0
+        self.history: deque = deque(maxlen=history)
+        self.queue_size = queue_size
+        self.max_resyncs = max_resyncs
+        self.resync_window = resync_window
+        self.evicted = 0
+        self.heartbeat_sec = heartbeat_sec
+        self.heartbeat_task = None
+        self.listeners: list = []
+        self.control_listeners: list = []  # 워커 간 알림(캐시 무효화 등)용. SSE 구독자에게는 가지 않는다.
+    async def start(self):
+        await self.broker.start(self.deliver)
+        self.heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+    async def stop(self):
+        if self.heartbeat_task:
+            self.heartbeat_task.cancel()
+        await self.broker.stop()
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_sec)
+            self.heartbeat()
+    def heartbeat(self):
+        # 연결마다 타이머를 두지 않고 하나의 작업이 모든 구독자에게 한 번에 ping 을 넣는다.
+        # 보낼 이벤트가 이미 쌓여 있는 큐는 건너뛰고, 끊긴 연결은 ping 쓰기에서 정리된다.
+        for sub in list(self.subscribers):
+            if sub.queue.empty():
+                sub.queue.put_nowait(SSE_PING)
+    def connect(self, last_event_id: int | None = None) -> SseSubscriber:
+        sub = SseSubscriber(self.queue_size)
+        sub.sent_id = self.last_id if last_event_id is None else last_event_id
+        if last_event_id is not None and last_event_id != self.last_id:
+            # 재접속: 놓친 이벤트만 다시 보내고, 버퍼 밖(또는 다른 워커/재시작)이면 재동기화 요청
+            missed = [msg for msg in self.history if msg["id"] > last_event_id]
+            if self.history and self.history[0]["id"] <= last_event_id + 1 and last_event_id < self.last_id \
+                    and len(missed) < self.queue_size:
+                for msg in missed:
+                    sub.queue.put_nowait(msg)
+            else:
+                sub.queue.put_nowait({"id": self.last_id, "event": "resync", "data": {}})
+        self.subscribers.add(sub)
+        return sub
+    def disconnect(self, sub: SseSubscriber):
+        self.subscribers.discard(sub)
+    async def broadcast(self, event: str, data: dict):
+        msg_id = await self.broker.next_id()
+        await self.broker.publish({"id": msg_id, "event": event, "data": data})
+    async def notify(self, event: str, data: dict):
+        # 이벤트 번호/링버퍼 없이 모든 워커의 control_listeners 에만 전달한다
+        await self.broker.publish({"id": 0, "event": event, "data": data, "control": True})
+    async def deliver(self, msg: dict):
+        # 브로커가 모든 워커에서 호출: 링버퍼에 쌓고 이 워커의 구독자에게 전달 (대기 없음)
+        if msg.get("control"):
+            for listener in self.control_listeners:
+                listener(msg)
+            return
+        self.last_id = max(self.last_id, msg["id"])
+        self.history.append(msg)
+        for listener in self.listeners:
+            listener(msg)
+        for sub in list(self.subscribers):
+            try:
+                sub.queue.put_nowait(msg)
+            except asyncio.QueueFull:
+                self._resync(sub, msg["id"])
+    def _resync(self, sub: SseSubscriber, msg_id: int):
+        # 밀린 이벤트는 버리고 재동기화 한 건으로 합친다. resync_window 초 안에 max_resyncs 번을 넘게
+        # 밀리면 연결을 끊는다 (오래 연결된 정상 클라이언트가 가끔 밀리는 것은 쌓이지 않는다).
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.resyncs += 1
+        now = time.monotonic()
+        sub.recent_resyncs.append(now)
+        while sub.recent_resyncs[0] < now - self.resync_window:
+            sub.recent_resyncs.popleft()
+        if len(sub.recent_resyncs) > self.max_resyncs:
+            sub.closed = True
+            self.evicted += 1
+            self.disconnect(sub)
+            sub.queue.put_nowait({"id": msg_id, "event": "close", "data": {}})
+        else:
+            sub.queue.put_nowait({"id": msg_id, "event": "resync", "data": {}})
+    def stats(self) -> dict:
+        now = datetime.now()
+        return {
+            "lastId": self.last_id,
+            "subscribers": len(self.subscribers),
+            "evicted": self.evicted,
+            "clients": [
+                {
+                    "queued": sub.queue.qsize(),
+                    "lag": self.last_id - sub.sent_id,
+                    "resyncs": sub.resyncs,
+                    "connectedSec": int((now - sub.connected_at).total_seconds()),
+                }
+                for sub in sorted(self.subscribers, key=lambda x: x.sent_id)
+            ],
+        }
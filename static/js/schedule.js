@@ -0,0 +1,83 @@
+// 예약 일정 화면(aide_view, candi_view, sched_today, sched_week) 공용 실시간 갱신.
+// 처음 렌더링한 목록에 마지막 버전 이후 변경분과 SSE 이벤트를 병합해서 render(정렬된 예약 목록) 를 다시 부른다.
+//   initial : 페이지에 실려 온 예약 목록 (서버 스냅샷)
+//   version : 그 스냅샷의 버전
+//   windows : 화면이 보여 주는 조회 구간 목록 (main.py window_dict). 없으면 전체.
+//             오늘 화면은 오늘 예약이 없을 때 3월 10일 구간을 함께 넘겨서, 대체 화면을 보는 중에도
+//             오늘 예약이 들어오면 버리지 않고 오늘 화면으로 돌아간다.
+function startScheduleSync({ initial, version, windows, render }) {
+  const scheduleMap = new Map();
+  const scheduleWindows = (windows && windows.length) ? windows : [null];
+  // 구간마다 변경분 조회 결과의 버전이 다르므로 따로 기억한다
+  const scheduleVersions = scheduleWindows.map(() => version);
+
+  function inWindow(r, win) {
+    if (!win) return true;
+    const from = String(r.reservFrom).substring(0, 16);
+    return from >= win.from && from < win.to;
+  }
+
+  function inScheduleWindow(r) {
+    return scheduleWindows.some(win => inWindow(r, win));
+  }
+
+  // 변경분 조회는 늦게 커밋된 변경을 놓치지 않도록 이미 받은 행을 겹쳐 보내므로 reservNo 로 덮어쓴다.
+  function mergeSchedule(reservs, full) {
+    if (full) scheduleMap.clear();
+    for (const r of reservs) {
+      const status = r.status || r.attrib || '';
+      if (status.includes('XXX') || !inScheduleWindow(r)) scheduleMap.delete(r.reservNo);
+      else scheduleMap.set(r.reservNo, r);
+    }
+    render(Array.from(scheduleMap.values())
+      .sort((a, b) => String(a.reservFrom).localeCompare(String(b.reservFrom))));
+  }
+
+  async function fetchWindow(win, i) {
+    let url = `/api/get_reserv?since=${scheduleVersions[i]}`;
+    if (win) url += `&start=${win.start}&end=${win.end}`;
+    const response = await fetch(url);
+    if (!response.ok) return {reservs: [], full: false};
+    const data = await response.json();
+    if (data.full) {
+      // 전체 목록이 오면 그 구간의 예약만 비우고 다시 채운다
+      for (const [reservNo, r] of scheduleMap) {
+        if (inWindow(r, win)) scheduleMap.delete(reservNo);
+      }
+    }
+    scheduleVersions[i] = data.version;
+    return data;
+  }
+
+  async function fetchLatestSchedule() {
+    try {
+      const results = await Promise.all(scheduleWindows.map(fetchWindow));
+      if (results.every(data => !data.full && data.reservs.length === 0)) return;
+      mergeSchedule(results.flatMap(data => data.reservs), false);
+    } catch (error) {
+      console.error("스케줄 데이터를 불러오는 중 오류 발생:", error);
+    }
+  }
+
+  mergeSchedule(initial, true);
+
+  // SSE 로 예약 변경 이벤트를 받아 바로 반영한다.
+  // 서버가 완성된 예약 행을 실어 보내므로 목록 전체를 다시 받지 않는다.
+  // 재접속 시 브라우저가 Last-Event-ID 를 보내서 놓친 이벤트만 다시 받는다.
+  const scheduleEvents = new EventSource('/sse/schedule');
+  ['reserv_created', 'reserv_updated', 'reserv_deleted'].forEach(name => {
+    scheduleEvents.addEventListener(name, e => mergeSchedule([JSON.parse(e.data)], false));
+  });
+  // 여러 건 등록은 한 이벤트로 묶여서 온다.
+  scheduleEvents.addEventListener('reserv_batch', e => mergeSchedule(JSON.parse(e.data).reservs, false));
+  // 접속 직전에 생긴 변경이나 버퍼 밖으로 밀려난 이벤트는 마지막 버전 이후 변경분으로 메운다.
+  scheduleEvents.addEventListener('connected', fetchLatestSchedule);
+  scheduleEvents.addEventListener('resync', fetchLatestSchedule);
+
+  // 브라우저 뒤로가기로 돌아왔을 때 최신화
+  window.addEventListener('pageshow', function(event) {
+    if (event.persisted) {
+      fetchLatestSchedule();
+    }
+  });
+}
@@ -0,0 +1,166 @@
+import os
+import sys
+import gzip
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from staticTools import STATIC_DIST, STATIC_MANIFEST, STATIC_ENCODINGS
+
+STATIC_ROOT = STATIC_DIST.parent
+# 업로드 사진(img), /history 갤러리(histManifest.py 담당), 동영상은 제외한다
+SKIP_DIRS = {"dist", "img", "assets/hist", "videos"}
+COMPRESSIBLE = {".css", ".js", ".mjs", ".map", ".json", ".svg", ".txt", ".html", ".xml", ".ttf", ".otf", ".eot", ".ico"}
+MIN_COMPRESS_BYTES = 1024
+MIN_SAVING = 0.1  # 10% 이상 줄지 않으면 압축본을 두지 않는다
+
+
+def collect_files(root: Path):
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = Path(dirpath).relative_to(root).as_posix()
+        dirnames[:] = sorted(d for d in dirnames
+                             if not d.startswith(".") and (d if rel_dir == "." else f"{rel_dir}/{d}") not in SKIP_DIRS)
+        for name in sorted(filenames):
+            if not name.startswith("."):
+                files.append((Path(dirpath) / name).relative_to(root).as_posix())
+    return files
+
+
+def write_atomic(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.part")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def link(src: Path, dst: Path):
+    # 해시 없는 이름은 해시 파일에 하드링크한다 (CSS 안의 상대 경로 url() 이 dist 안에서도 풀리도록)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if dst.exists() and os.path.samefile(src, dst):
+        return
+    tmp = dst.with_name(f".{dst.name}.part")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        tmp.write_bytes(src.read_bytes())
+    os.replace(tmp, dst)
+
+
+def compress(encoding: str, data: bytes, level: int):
+    if encoding == "br":
+        return brotli.compress(data, quality=level) if brotli else None
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def build_file(rel: str, root: str, dist: str, levels: dict):
+    # 워커 프로세스에서 실행. 해시 파일명은 내용이 같으면 이미 있으므로 다시 만들지 않는다.
+    # 원본에 하드링크하지 않고 복사한다 (원본을 제자리 수정하면 immutable 파일 내용이 바뀌므로).
+    data = (Path(root) / rel).read_bytes()
+    p = Path(rel)
+    hashed = p.with_name(f"{p.stem}.{hashlib.sha256(data).hexdigest()[:12]}{p.suffix}").as_posix()
+    hashed_path = Path(dist) / hashed
+    made = 0
+    if not hashed_path.exists():
+        write_atomic(hashed_path, data)
+        made += 1
+    link(hashed_path, Path(dist) / rel)
+
+    compressible = p.suffix.lower() in COMPRESSIBLE and len(data) >= MIN_COMPRESS_BYTES
+    for encoding, suffix in STATIC_ENCODINGS:
+        target = Path(dist) / f"{hashed}{suffix}"
+        if compressible and not target.exists():
+            blob = compress(encoding, data, levels[encoding])
+            if blob is not None and len(blob) <= len(data) * (1 - MIN_SAVING):
+                write_atomic(target, blob)
+                made += 1
+        plain = Path(dist) / f"{rel}{suffix}"
+        if target.exists():
+            link(target, plain)
+        else:
+            # 예전 버전의 압축본이 남아 있으면 다른 내용을 보내게 되므로 지운다
+            plain.unlink(missing_ok=True)
+    return rel, f"{STATIC_DIST.name}/{hashed}", made
+
+
+def prune(dist: Path, keep: set):
+    removed = 0
+    for dirpath, _, filenames in os.walk(dist):
+        for name in filenames:
+            path = Path(dirpath) / name
+            if path != STATIC_MANIFEST and path.relative_to(dist).as_posix() not in keep:
+                print(f"[PRUNE] {path}")
+                path.unlink()
+                removed += 1
+    return removed
+
+
+def build(root: Path, dist: Path, jobs: int, levels: dict, do_prune: bool):
+    if not root.is_dir():
+        print(f"[ERROR] 정적 폴더가 존재하지 않습니다: {root}")
+        return 1
+    if brotli is None:
+        print("[WARN] brotli 모듈이 없어 .br 은 만들지 않습니다 (pip install brotli)")
+    files = collect_files(root)
+
+    errors = 0
+    made = 0
+    manifest = {}
+    with ProcessPoolExecutor(jobs) as pool:
+        futures = [pool.submit(build_file, rel, str(root), str(dist), levels) for rel in files]
+        for rel, future in zip(files, futures):
+            try:
+                rel, hashed, count = future.result()
+            except Exception as e:
+                errors += 1
+                print(f"[ERROR] {rel}: {e}")
+                continue
+            made += count
+            manifest[rel] = hashed
+            if count:
+                print(f"[OK] {rel} -> {hashed}")
+
+    write_atomic(STATIC_MANIFEST, json.dumps({"files": manifest}, ensure_ascii=False, indent=1).encode("utf-8"))
+
+    removed = 0
+    if do_prune and errors == 0:
+        keep = set()
+        for rel, hashed in manifest.items():
+            for name in (rel, hashed.split("/", 1)[1]):
+                keep.update([name] + [f"{name}{suffix}" for _, suffix in STATIC_ENCODINGS])
+        removed = prune(dist, keep)
+
+    print("\n===== 완료 =====")
+    print(f"파일: {len(files)}")
+    print(f"새로 만든 파일: {made}")
+    print(f"정리: {removed}")
+    print(f"에러: {errors}")
+    print(f"매니페스트: {STATIC_MANIFEST}")
+    return 0 if errors == 0 else 2
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="정적 파일의 해시 파일명 사본과 gzip/brotli 압축본을 static/dist 에 만듭니다. 배포 시 한 번 실행합니다.")
+    parser.add_argument("--jobs", type=int, default=0, help="동시 처리 프로세스 수 (0: CPU 코어 수)")
+    parser.add_argument("--gzip-level", type=int, default=9, choices=range(1, 10), metavar="1-9", help="gzip 압축 레벨")
+    parser.add_argument("--brotli-quality", type=int, default=11, choices=range(12), metavar="0-11", help="brotli 품질")
+    parser.add_argument("--prune", action="store_true", help="현재 매니페스트에 없는 예전 해시 파일 삭제 (캐시된 옛 페이지가 참조할 수 있음)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    levels = {"gzip": args.gzip_level, "br": args.brotli_quality}
+    sys.exit(build(STATIC_ROOT, STATIC_DIST, args.jobs or os.cpu_count() or 1, levels, args.prune))
+
+
+if __name__ == "__main__":
+    main()
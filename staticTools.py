@@ -0,0 +1,26 @@
+import re
+import json
+from pathlib import Path
+
+# 정적 파일 공용 (main.py, staticBuild.py): staticBuild.py 가 static/dist 아래에 내용 해시 파일명 사본과
+# .br/.gz 압축본을 만들고, 앱은 매니페스트로 주소를 바꾼다. staticBuild.py 가 main 을 import 하지 않도록
+# 앱/DB/.env 에 의존하는 것은 여기 두지 않는다.
+STATIC_DIST = Path("static/dist")
+STATIC_MANIFEST = STATIC_DIST / "manifest.json"
+STATIC_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+STATIC_HASHED = re.compile(r"^dist/.+\.[0-9a-f]{12}\.[^./]+$")
+STATIC_IMMUTABLE = "public, max-age=31536000, immutable"
+static_manifest: dict[str, str] = {}  # "css/styles.css" -> "dist/css/styles.<hash>.css"
+
+
+def static_url(path: str) -> str:
+    # 템플릿용. 빌드된 해시 파일명이 있으면 그 주소를, 없으면 원래 주소를 돌려준다.
+    return f"/static/{static_manifest.get(path, path)}"
+
+
+def read_static_manifest() -> dict:
+    try:
+        with STATIC_MANIFEST.open(encoding="utf-8") as f:
+            return json.load(f)["files"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return {}
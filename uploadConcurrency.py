@@ -0,0 +1,94 @@
+import io
+import os
+import sys
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+
+def make_jpeg(seed: int) -> bytes:
+    # 내용이 모두 달라야 중복 제거(같은 사진 재업로드)에 걸리지 않는다.
+    from PIL import Image
+    img = Image.new("RGB", (64, 48), (seed % 256, seed // 256 % 256, 128))
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+async def run_server(url, event_no, count, concurrency):
+    # 실행 중인 서버의 /api/eventphotoupload 로 동시에 올리고 파일명 중복을 검사한다.
+    import httpx
+    sem = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        async def upload(i):
+            async with sem:
+                files = {"photo": (f"t{i}.jpg", make_jpeg(i), "image/jpeg")}
+                r = await client.post(f"/api/eventphotoupload/{event_no}", files=files)
+                return r.status_code, r.json().get("filename") if r.status_code == 200 else r.text
+        results = await asyncio.gather(*(upload(i) for i in range(count)))
+    failed = [r for r in results if r[0] != 200]
+    names = [r[1] for r in results if r[0] == 200]
+    return failed, names
+
+
+def allocate_local(directory: str, event_no: int, count: int):
+    # 워커 프로세스 하나 = uvicorn 워커 하나. 각자 색인을 갖고 같은 폴더에 번호를 잡는다.
+    from photoIndex import PhotoIndex, parse_ephoto_name
+    index = PhotoIndex(Path(directory), "/static/img/event_photos", parse_ephoto_name)
+    index.rebuild()
+    names = []
+    for _ in range(count):
+        index.refresh()
+        name, path, reserved = index.allocate(event_no, None, lambda idx: f"{event_no}-{idx}.jpg")
+        os.replace(reserved, path)  # 업로드 라우트처럼 예약 파일을 최종 이름으로 옮긴다
+        index.add(name)
+        names.append(name)
+    return names
+
+
+def run_local(event_no, count, workers):
+    with tempfile.TemporaryDirectory() as directory:
+        per_worker = count // workers
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(allocate_local, directory, event_no, per_worker) for _ in range(workers)]
+            names = [name for f in futures for name in f.result()]
+        # 숨김 예약 파일이 남아 있으면 폴더 파일 수가 맞지 않는다
+        on_disk = len(list(Path(directory).iterdir()))
+    return names, on_disk
+
+
+def report(names, expected):
+    dups = [name for name, n in Counter(names).items() if n > 1]
+    print(f"파일명: {len(names)} / {expected}")
+    print(f"중복: {len(dups)} {dups[:10]}")
+    return 0 if not dups and len(names) == expected else 1
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="동시 업로드 시 사진 파일명 할당에 충돌이 없는지 확인합니다.")
+    parser.add_argument("--url", help="서버 주소 (예: http://127.0.0.1:8000). 없으면 로컬 프로세스로 할당기만 검사")
+    parser.add_argument("--event", type=int, default=999999, help="테스트용 예약번호")
+    parser.add_argument("--count", type=int, default=400, help="업로드(할당) 수")
+    parser.add_argument("--concurrency", type=int, default=200, help="서버 모드 동시 요청 수")
+    parser.add_argument("--workers", type=int, default=8, help="로컬 모드 프로세스 수")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.url:
+        failed, names = asyncio.run(run_server(args.url, args.event, args.count, args.concurrency))
+        for status, detail in failed[:10]:
+            print(f"[FAIL] {status} {detail[:200]}")
+        sys.exit(report(names, args.count) or (1 if failed else 0))
+    count = args.count // args.workers * args.workers
+    names, on_disk = run_local(args.event, count, args.workers)
+    print(f"폴더 파일 수: {on_disk}")
+    sys.exit(report(names, count) or (0 if on_disk == count else 1))
+
+
+if __name__ == "__main__":
+    main()